@@ -17,6 +17,7 @@ CACHES = {
     "default": {},
     "local": {
         "backend": "spaceone.core.cache.local_cache.LocalCache",
+        "engine": "LocalCache",
         "max_size": 128,
         "ttl": 300,
     },
@@ -50,6 +51,34 @@ CONNECTORS = {
     }
 }
 
+# Resource Stat Settings
+STAT_QUERY_MAX_WORKERS = 8
+STAT_SINGLE_FLIGHT = True
+STAT_PROFILE_LOG = False
+STAT_PLAN_OPTIMIZER = True
+STAT_QUERY_CACHE = {
+    "enabled": False,
+    "alias": "local",
+    "ttl": 60,
+    "resource_ttl": {
+        "identity.Project": 300,
+        "identity.Workspace": 300,
+        "cost_analysis.Cost": 300,
+    },
+    "max_results": 10000,
+}
+
+# History Settings
+HISTORY_INSERT_BATCH_SIZE = 1000
+# New history is written as buckets while enabled. Reads include the buckets
+# as long as any exist, so the flag can be turned off again without losing
+# the history written in the meantime. Until the first bucket is found, the
+# bucket collection is checked once per HISTORY_BUCKET_CHECK_INTERVAL seconds.
+HISTORY_BUCKET_STORAGE = False
+HISTORY_BUCKET_SIZE = 1000
+HISTORY_BUCKET_CHECK_INTERVAL = 60
+HISTORY_RETENTION_MAX_PERIODS = 7
+
 # Queue Settings
 collect_queue = "statistics_q"
 QUEUES = {
@@ -60,8 +89,20 @@ QUEUES = {
         "channel": "stat_scheduler",
     },
 }
+# Registered by the scheduler deployment, see application_scheduler in the
+# helm values:
+#   StatIntervalScheduler (stat_hourly_scheduler) dispatches due schedules
+#   HistoryRetentionScheduler (history_retention_scheduler) applies retention
 SCHEDULERS = {}
 WORKERS = {}
 
+# Scheduler Settings
+STAT_SCHEDULER_BATCH_MODE = False
+STAT_SCHEDULER_SPREAD_WINDOW = 0
+STAT_SCHEDULER_MAX_QUEUE_DEPTH = 0
+STAT_SCHEDULER_MAX_DOMAIN_SCHEDULES = 0
+STAT_SCHEDULER_JOB_SIZE = 10
+STAT_SCHEDULE_RUN_TIMEOUT = 3600
+
 # System Token Settings
 TOKEN = ""
@@ -35,3 +35,7 @@ class ERROR_INVALID_RESOURCE_TYPE(ERROR_INVALID_ARGUMENT):
 
 class ERROR_REQUIRED_QUERY_OPERATION(ERROR_INVALID_ARGUMENT):
     _message = 'The first stage of aggregation requires a query.'
+
+
+class ERROR_STATISTICS_FORMULA_NOT_ALLOWED(ERROR_INVALID_ARGUMENT):
+    _message = 'Statistics formula is not allowed. (formula = {formula}, reason = {reason})'
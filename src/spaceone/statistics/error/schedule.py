@@ -3,3 +3,7 @@ from spaceone.core.error import *
 
 class ERROR_SCHEDULE_OPTION(ERROR_INVALID_ARGUMENT):
     _message = 'Only one schedule option can be set. (cron | interval | minutes | hours)'
+
+
+class ERROR_RETENTION_OPTION(ERROR_INVALID_ARGUMENT):
+    _message = 'Retention option is invalid. (reason = {reason})'
@@ -0,0 +1,61 @@
+import logging
+
+from spaceone.core.error import ERROR_CONFIGURATION
+from spaceone.core import config
+from spaceone.core.locator import Locator
+from spaceone.core.scheduler import HourlyScheduler
+
+__all__ = ["HistoryRetentionScheduler"]
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HistoryRetentionScheduler(HourlyScheduler):
+    def __init__(self, queue, interval, minute=":30"):
+        super().__init__(queue, interval, minute)
+        self.locator = Locator()
+        self._init_config()
+
+    def _init_config(self):
+        self._token = config.get_global("TOKEN")
+        if self._token is None:
+            raise ERROR_CONFIGURATION(key="TOKEN")
+
+    def create_task(self):
+        result = []
+        for domain_info in self.list_domains():
+            result.append(self._create_job_request(domain_info["domain_id"]))
+        return result
+
+    def list_domains(self):
+        try:
+            schedule_svc = self.locator.get_service(
+                "ScheduleService", {"token": self._token}
+            )
+            response = schedule_svc.list_domains({})
+            return response.get("results", [])
+        except Exception as e:
+            _LOGGER.error(e)
+            return []
+
+    def _create_job_request(self, domain_id: str) -> dict:
+        return {
+            "name": "statistics_history_retention",
+            "version": "v1",
+            "executionEngine": "BaseWorker",
+            "stages": [
+                {
+                    "locator": "SERVICE",
+                    "name": "HistoryService",
+                    "metadata": {
+                        "token": self._token,
+                    },
+                    "method": "apply_retention",
+                    "params": {
+                        "params": {
+                            "domain_id": domain_id,
+                        }
+                    },
+                }
+            ],
+        }
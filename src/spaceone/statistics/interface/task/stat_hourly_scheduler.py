@@ -1,21 +1,35 @@
+import itertools
 import logging
-from datetime import datetime
 
 from spaceone.core.error import ERROR_CONFIGURATION
 from spaceone.core import config
 from spaceone.core.locator import Locator
-from spaceone.core.scheduler import HourlyScheduler
+from spaceone.core.scheduler import HourlyScheduler, IntervalScheduler
 
-__all__ = ["StatHourlyScheduler"]
+try:
+    import redis
+except ImportError:
+    redis = None
+
+__all__ = ["StatHourlyScheduler", "StatIntervalScheduler"]
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class StatHourlyScheduler(HourlyScheduler):
-    def __init__(self, queue, interval, minute=":00"):
-        super().__init__(queue, interval, minute)
-        self.locator = Locator()
-        self._init_config()
+class StatTaskMixin:
+    """Dispatches the schedules whose next_run_at has passed.
+
+    StatHourlyScheduler checks once an hour. StatIntervalScheduler checks every
+    interval seconds, which is needed for cron, interval and minutes schedules
+    and for hours schedules spread by STAT_SCHEDULER_SPREAD_WINDOW.
+
+    STAT_SCHEDULER_JOB_SIZE splits the schedules of a domain into jobs. With
+    STAT_SCHEDULER_MAX_QUEUE_DEPTH, schedules of the current hour only open
+    new jobs while the job queue is shorter than the limit, and
+    STAT_SCHEDULER_MAX_DOMAIN_SCHEDULES bounds them per domain and tick.
+    """
+
+    _queue_conn = None
 
     def _init_config(self):
         self._token = config.get_global("TOKEN")
@@ -23,13 +37,37 @@ class StatHourlyScheduler(HourlyScheduler):
             raise ERROR_CONFIGURATION(key="TOKEN")
 
     def create_task(self):
-        current_hour = datetime.utcnow().hour
-        result = []
-        for domain_info in self.list_domains():
-            stp = self._create_job_request(domain_info["domain_id"], current_hour)
-            if stp is not None:
-                result.append(stp)
-        return result
+        domain_ids = [domain_info["domain_id"] for domain_info in self.list_domains()]
+
+        # Due schedules are claimed when they are listed, so nothing is listed
+        # while the domains are unknown, e.g. identity is unavailable.
+        if len(domain_ids) == 0:
+            _LOGGER.debug("[create_task] no domains to dispatch")
+            return []
+
+        job_size = config.get_global("STAT_SCHEDULER_JOB_SIZE", 0)
+
+        jobs_by_domain = []
+        schedules_by_domain = self._list_due_schedules(domain_ids, job_size)
+        for domain_id, schedule_ids in schedules_by_domain.items():
+            chunk_size = job_size or len(schedule_ids)
+            jobs_by_domain.append(
+                [
+                    self._create_job_request(
+                        domain_id, schedule_ids[start : start + chunk_size]
+                    )
+                    for start in range(0, len(schedule_ids), chunk_size)
+                ]
+            )
+
+        # Jobs are queued round-robin across domains, so a domain with many
+        # schedules does not hold back the others on the FIFO queue.
+        return [
+            job
+            for jobs in itertools.zip_longest(*jobs_by_domain)
+            for job in jobs
+            if job is not None
+        ]
 
     def list_domains(self):
         try:
@@ -42,52 +80,131 @@ class StatHourlyScheduler(HourlyScheduler):
             _LOGGER.error(e)
             return []
 
-    def _list_schedule(self, domain_id: str, current_hour: int):
-        params = {
-            "query": {
-                "filter": [{"k": "schedule.hours", "v": current_hour, "o": "eq"}],
-            },
-            "domain_id": domain_id,
-        }
-        schedule_svc = self.locator.get_service(
-            "ScheduleService", {"token": self._token}
+    def _list_due_schedules(self, domain_ids: list, job_size: int) -> dict:
+        try:
+            schedule_svc = self.locator.get_service(
+                "ScheduleService", {"token": self._token}
+            )
+            response = schedule_svc.list_due_schedules(
+                {
+                    "domain_ids": domain_ids,
+                    "job_limit": self._get_dispatch_limit(),
+                    "domain_limit": config.get_global(
+                        "STAT_SCHEDULER_MAX_DOMAIN_SCHEDULES", 0
+                    ),
+                    "job_size": job_size,
+                }
+            )
+        except Exception as e:
+            _LOGGER.error(e)
+            return {}
+
+        schedules_by_domain = {}
+        for schedule in response.get("results", []):
+            schedules_by_domain.setdefault(schedule["domain_id"], []).append(
+                schedule["schedule_id"]
+            )
+
+        _LOGGER.debug(
+            f"[_list_due_schedules] scheduled count: "
+            f"{response.get('total_count', 0)} in {len(schedules_by_domain)} domains"
         )
-        schedules, total_count = schedule_svc.list(params)
+        return schedules_by_domain
+
+    def _get_dispatch_limit(self):
+        # The queue holds jobs, so the limit is the number of jobs to open.
+        max_queue_depth = config.get_global("STAT_SCHEDULER_MAX_QUEUE_DEPTH", 0)
+        if not max_queue_depth:
+            return None
+
+        queue_depth = self._get_queue_depth()
+        limit = max(max_queue_depth - queue_depth, 0)
+
         _LOGGER.debug(
-            f"[_list_schedule] scheduled count (UTC {current_hour}): {total_count}"
+            f"[_get_dispatch_limit] queue depth: {queue_depth}, limit: {limit}"
         )
-        return schedules
-
-    def _create_job_request(self, domain_id: str, current_hour: int):
-        schedules = self._list_schedule(domain_id, current_hour)
-        schedule_count = len(schedules)
-        if schedule_count > 0:
-            _LOGGER.debug(f"[_create_job_request] {domain_id}: {len(schedules)}")
-
-            schedule_jobs = []
-            for schedule in schedules:
-                job = {
-                    "locator": "SERVICE",
-                    "name": "HistoryService",
-                    "metadata": {
-                        "token": self._token,
-                    },
-                    "method": "create",
-                    "params": {
-                        "params": {
-                            "schedule_id": schedule.schedule_id,
-                            "domain_id": domain_id,
-                        }
-                    },
-                }
-                schedule_jobs.append(job)
-
-            stp = {
-                "name": "statistics_hourly_schedule",
-                "version": "v1",
-                "executionEngine": "BaseWorker",
-                "stages": schedule_jobs,
-            }
-            return stp
+        return limit
+
+    def _get_queue_depth(self) -> int:
+        # Pacing is skipped when the queue cannot be inspected.
+        queue_conf = config.get_global("QUEUES", {}).get(self.queue, {})
+        if redis is None or "redis" not in queue_conf.get("backend", "").lower():
+            return 0
+
+        try:
+            if self._queue_conn is None:
+                self._queue_conn = redis.Redis(
+                    host=queue_conf.get("host", "localhost"),
+                    port=queue_conf.get("port", 6379),
+                    db=queue_conf.get("db", 0),
+                )
+
+            return self._queue_conn.llen(queue_conf.get("channel", self.queue))
+        except Exception as e:
+            _LOGGER.warning(f"[_get_queue_depth] failed to get queue depth: {e}")
+            return 0
+
+    def _create_job_request(self, domain_id: str, schedule_ids: list) -> dict:
+        _LOGGER.debug(f"[_create_job_request] {domain_id}: {len(schedule_ids)}")
+
+        if config.get_global("STAT_SCHEDULER_BATCH_MODE", False):
+            # One job per domain, so upstream queries shared by the
+            # schedules are fetched only once.
+            schedule_jobs = [self._create_batch_job(schedule_ids, domain_id)]
         else:
-            return None
+            schedule_jobs = [
+                self._create_job(schedule_id, domain_id) for schedule_id in schedule_ids
+            ]
+
+        return {
+            "name": "statistics_hourly_schedule",
+            "version": "v1",
+            "executionEngine": "BaseWorker",
+            "stages": schedule_jobs,
+        }
+
+    def _create_job(self, schedule_id: str, domain_id: str) -> dict:
+        return {
+            "locator": "SERVICE",
+            "name": "HistoryService",
+            "metadata": {
+                "token": self._token,
+            },
+            "method": "create",
+            "params": {
+                "params": {
+                    "schedule_id": schedule_id,
+                    "domain_id": domain_id,
+                }
+            },
+        }
+
+    def _create_batch_job(self, schedule_ids: list, domain_id: str) -> dict:
+        return {
+            "locator": "SERVICE",
+            "name": "HistoryService",
+            "metadata": {
+                "token": self._token,
+            },
+            "method": "create_batch",
+            "params": {
+                "params": {
+                    "schedule_ids": schedule_ids,
+                    "domain_id": domain_id,
+                }
+            },
+        }
+
+
+class StatHourlyScheduler(StatTaskMixin, HourlyScheduler):
+    def __init__(self, queue, interval, minute=":00"):
+        super().__init__(queue, interval, minute)
+        self.locator = Locator()
+        self._init_config()
+
+
+class StatIntervalScheduler(StatTaskMixin, IntervalScheduler):
+    def __init__(self, queue, interval):
+        super().__init__(queue, interval)
+        self.locator = Locator()
+        self._init_config()
@@ -0,0 +1,217 @@
+import ast
+import re
+from functools import lru_cache
+
+from spaceone.statistics.error import *
+
+try:
+    import numexpr  # noqa: F401
+
+    _ENGINE = "numexpr"
+except ImportError:
+    _ENGINE = "python"
+
+__all__ = ["Formula", "compile_formula"]
+
+_BACKTICK_NAME = re.compile(r"`([^`]*)`")
+_BACKTICK_PLACEHOLDER = "backtick_name_{index}_"
+
+_ALLOWED_FUNCTIONS = [
+    "abs",
+    "sin",
+    "cos",
+    "tan",
+    "arcsin",
+    "arccos",
+    "arctan",
+    "arctan2",
+    "sinh",
+    "cosh",
+    "tanh",
+    "arcsinh",
+    "arccosh",
+    "arctanh",
+    "exp",
+    "expm1",
+    "log",
+    "log10",
+    "log1p",
+    "sqrt",
+]
+
+# Column methods, which can also be chained as in 'cost.fillna(0).round(2)'.
+_ALLOWED_METHODS = [
+    "abs",
+    "round",
+    "fillna",
+    "isna",
+    "notna",
+    "isnull",
+    "notnull",
+    "isin",
+    "between",
+]
+
+# Members of the pandas accessors, such as 'name.str.contains()'.
+_ALLOWED_ACCESSORS = {
+    "str": [
+        "contains",
+        "startswith",
+        "endswith",
+        "match",
+        "lower",
+        "upper",
+        "strip",
+        "len",
+    ],
+    "dt": [
+        "year",
+        "quarter",
+        "month",
+        "day",
+        "hour",
+        "minute",
+        "second",
+        "dayofweek",
+        "dayofyear",
+        "date",
+        "strftime",
+    ],
+}
+
+_ALLOWED_NODES = (
+    ast.Module,
+    ast.Expr,
+    ast.Assign,
+    ast.Name,
+    ast.Load,
+    ast.Store,
+    ast.Constant,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.List,
+    ast.Tuple,
+    ast.Call,
+    ast.Attribute,
+    ast.keyword,
+    ast.operator,
+    ast.unaryop,
+    ast.boolop,
+    ast.cmpop,
+)
+
+
+class Formula:
+    """Parsed and validated formula of an aggregate formula stage."""
+
+    def __init__(self, expression: str, tree: ast.Module, names: dict):
+        self.expression = expression
+        self.tree = tree
+        self.names = names
+        self.targets = []
+        self.columns = set()
+        self.engine = _ENGINE
+
+        for statement in tree.body:
+            if isinstance(statement, ast.Assign):
+                self.targets.append(self.get_name(statement.targets[0]))
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                if node.id not in _ALLOWED_FUNCTIONS:
+                    self.columns.add(self.get_name(node))
+
+            # Accessor methods such as 'name.str.contains()'
+            # are only supported by the python engine.
+            elif isinstance(node, ast.Attribute):
+                self.engine = "python"
+
+    @property
+    def is_assignment(self) -> bool:
+        return len(self.targets) == len(self.tree.body)
+
+    def get_name(self, node: ast.Name) -> str:
+        return self.names.get(node.id, node.id)
+
+    def eval(self, df):
+        return df.eval(self.expression, engine=self.engine)
+
+    def query(self, df):
+        return df.query(self.expression, engine=self.engine)
+
+
+@lru_cache(maxsize=1024)
+def compile_formula(expression: str, mode: str = "eval") -> Formula:
+    names = {}
+
+    def _replace_backtick_name(match):
+        placeholder = _BACKTICK_PLACEHOLDER.format(index=len(names))
+        names[placeholder] = match.group(1)
+        return placeholder
+
+    source = _BACKTICK_NAME.sub(_replace_backtick_name, expression)
+    source = "\n".join(line.strip() for line in source.splitlines() if line.strip())
+
+    try:
+        tree = ast.parse(source, mode="exec")
+    except SyntaxError:
+        raise ERROR_STATISTICS_FORMULA(formula=expression)
+
+    if len(tree.body) == 0:
+        raise ERROR_STATISTICS_FORMULA(formula=expression)
+
+    for statement in tree.body:
+        if isinstance(statement, ast.Assign):
+            if mode == "query":
+                _raise_not_allowed(expression, "assignment in query")
+
+            if len(statement.targets) != 1 or not isinstance(
+                statement.targets[0], ast.Name
+            ):
+                _raise_not_allowed(expression, "invalid assignment")
+
+        elif mode == "query" and len(tree.body) > 1:
+            _raise_not_allowed(expression, "multiple expressions in query")
+
+    for node in ast.walk(tree):
+        _check_node(expression, node)
+
+    return Formula(expression, tree, names)
+
+
+def _check_node(expression: str, node: ast.AST) -> None:
+    if not isinstance(node, _ALLOWED_NODES):
+        _raise_not_allowed(expression, type(node).__name__)
+
+    if isinstance(node, ast.MatMult):
+        _raise_not_allowed(expression, "MatMult")
+
+    if isinstance(node, ast.Name) and node.id.startswith("__"):
+        _raise_not_allowed(expression, node.id)
+
+    if isinstance(node, ast.Attribute):
+        _check_attribute(expression, node)
+
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name):
+            if node.func.id not in _ALLOWED_FUNCTIONS:
+                _raise_not_allowed(expression, f"{node.func.id}()")
+        elif not isinstance(node.func, ast.Attribute):
+            _raise_not_allowed(expression, "Call")
+
+
+def _check_attribute(expression: str, node: ast.Attribute) -> None:
+    accessor = node.value.attr if isinstance(node.value, ast.Attribute) else None
+    if accessor in _ALLOWED_ACCESSORS:
+        allowed_names = _ALLOWED_ACCESSORS[accessor]
+    else:
+        allowed_names = _ALLOWED_METHODS + list(_ALLOWED_ACCESSORS)
+
+    if node.attr not in allowed_names:
+        _raise_not_allowed(expression, node.attr)
+
+
+def _raise_not_allowed(expression: str, reason: str) -> None:
+    raise ERROR_STATISTICS_FORMULA_NOT_ALLOWED(formula=expression, reason=reason)
@@ -0,0 +1,228 @@
+import csv
+import io
+import json
+from datetime import datetime
+from numbers import Integral, Real
+from typing import Iterable, Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+__all__ = ["EXPORT_FORMATS", "is_parquet_supported", "export_history"]
+
+EXPORT_FORMATS = ["NDJSON", "CSV", "PARQUET"]
+
+# Keys of history values cannot contain dots, so the meta columns never
+# collide with value columns.
+_TOPIC_COLUMN = "meta.topic"
+_CREATED_AT_COLUMN = "meta.created_at"
+_META_COLUMNS = [_TOPIC_COLUMN, _CREATED_AT_COLUMN]
+
+
+def is_parquet_supported() -> bool:
+    return pa is not None
+
+
+def _to_iso8601(value: datetime) -> str:
+    return value.isoformat(timespec="milliseconds") + "Z" if value else None
+
+
+def _get_columns(rows: list) -> list:
+    columns = dict.fromkeys(_META_COLUMNS)
+    for row in rows:
+        columns.update(dict.fromkeys(row.get("values", {})))
+
+    return list(columns)
+
+
+def _flatten(row: dict) -> dict:
+    return {
+        **row.get("values", {}),
+        _TOPIC_COLUMN: row.get("topic"),
+        _CREATED_AT_COLUMN: _to_iso8601(row.get("created_at")),
+    }
+
+
+def _export_ndjson(batches: Iterable[list]) -> Iterator[bytes]:
+    for rows in batches:
+        lines = [
+            json.dumps(
+                {
+                    "topic": row.get("topic"),
+                    "values": row.get("values", {}),
+                    "created_at": _to_iso8601(row.get("created_at")),
+                },
+                default=str,
+            )
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _export_csv(batches: Iterable[list], columns: list = None) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = None
+
+    for rows in batches:
+        if writer is None:
+            writer = csv.DictWriter(
+                buffer,
+                fieldnames=columns or _get_columns(rows),
+                extrasaction="ignore",
+            )
+            writer.writeheader()
+
+        writer.writerows(_flatten(row) for row in rows)
+
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink that hands out what was written since the last pop.
+
+    The position keeps counting across pops, since the Parquet footer refers
+    to absolute offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _get_parquet_type(column: str, records: list):
+    if column in _META_COLUMNS:
+        return pa.string()
+
+    value_types = {
+        type(record.get(column)) for record in records if record.get(column) is not None
+    }
+
+    if value_types and value_types <= {bool}:
+        return pa.bool_()
+    elif value_types and all(
+        issubclass(value_type, (Integral, Real)) and value_type is not bool
+        for value_type in value_types
+    ):
+        # Integers are widened, since a later batch may hold floats.
+        return pa.float64()
+    elif value_types and all(
+        issubclass(value_type, datetime) for value_type in value_types
+    ):
+        return pa.timestamp("ms")
+
+    # All-null columns and mixed or nested values are written as strings.
+    return pa.string()
+
+
+def _get_parquet_schema(columns: list, records: list):
+    return pa.schema(
+        [(column, _get_parquet_type(column, records)) for column in columns]
+    )
+
+
+def _to_parquet_value(value, value_type):
+    if value is None:
+        return None
+
+    if pa.types.is_string(value_type):
+        if isinstance(value, str):
+            return value
+        elif isinstance(value, datetime):
+            return _to_iso8601(value)
+
+        return json.dumps(value, default=str)
+    elif pa.types.is_floating(value_type):
+        if isinstance(value, (Integral, Real)) and not isinstance(value, bool):
+            return float(value)
+    elif pa.types.is_boolean(value_type):
+        if isinstance(value, bool):
+            return value
+    elif isinstance(value, datetime):
+        return value
+
+    return None
+
+
+def _export_parquet(batches: Iterable[list], columns: list = None) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+
+    for rows in batches:
+        records = [_flatten(row) for row in rows]
+
+        if writer is None:
+            # The schema is fixed by the first batch, since the Parquet
+            # writer cannot change it afterwards.
+            schema = _get_parquet_schema(columns or _get_columns(rows), records)
+            writer = pq.ParquetWriter(sink, schema)
+
+        # Unknown columns are dropped, missing ones and values that do not
+        # fit the column type are null.
+        table = pa.Table.from_pylist(
+            [
+                {
+                    field.name: _to_parquet_value(record.get(field.name), field.type)
+                    for field in schema
+                }
+                for record in records
+            ],
+            schema=schema,
+        )
+
+        writer.write_table(table)
+        yield sink.pop()
+
+    if writer is not None:
+        writer.close()
+        yield sink.pop()
+
+
+def export_history(
+    batches: Iterable[list], export_format: str = "NDJSON", columns: list = None
+) -> Iterator[bytes]:
+    """Serializes batches of history documents into chunks of bytes.
+
+    Only one batch is held in memory at a time. CSV and Parquet flatten the
+    values into columns next to meta.topic and meta.created_at, which are
+    taken from the first batch unless columns are given.
+
+    Args:
+        batches: lists of history documents (topic, values, created_at)
+        export_format: NDJSON | CSV | PARQUET
+        columns: columns of CSV and Parquet
+
+    Returns:
+        iterator of bytes
+    """
+
+    if export_format == "CSV":
+        return _export_csv(batches, columns)
+    elif export_format == "PARQUET":
+        return _export_parquet(batches, columns)
+    else:
+        return _export_ndjson(batches)
@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+__all__ = [
+    "encode_cursor",
+    "decode_cursor",
+    "make_cursor_query",
+]
+
+
+def encode_cursor(created_at: datetime, _id, row_index: int = None) -> str:
+    """Encodes the sort key of the last document into an opaque cursor."""
+
+    cursor = {"t": created_at.isoformat(), "i": str(_id)}
+    if row_index is not None:
+        cursor["r"] = row_index
+
+    data = json.dumps(cursor, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor = json.loads(data)
+        decoded = {
+            "created_at": datetime.fromisoformat(cursor["t"]),
+            "_id": ObjectId(cursor["i"]),
+        }
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("cursor is malformed.")
+
+    if "r" in cursor:
+        decoded["row_index"] = int(cursor["r"])
+
+    return decoded
+
+
+def make_cursor_query(cursor: dict) -> dict:
+    """Matches documents after the cursor in (-created_at, -_id, -row_index) order.
+
+    row_index only exists on rows expanded from history buckets, which share
+    the _id of their bucket.
+    """
+
+    created_at = cursor["created_at"]
+    _id = cursor["_id"]
+
+    conditions = [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": _id}},
+    ]
+
+    if "row_index" in cursor:
+        conditions.append(
+            {
+                "created_at": created_at,
+                "_id": _id,
+                "row_index": {"$lt": cursor["row_index"]},
+            }
+        )
+
+    return {"$or": conditions}
@@ -0,0 +1,187 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+__all__ = ["CronExpression", "get_next_run_at", "get_spread_offset"]
+
+_EPOCH = datetime(1970, 1, 1)
+_MAX_ITERATIONS = 10000
+
+_MONTH_NAMES = {
+    name: index + 1
+    for index, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun"]
+        + ["jul", "aug", "sep", "oct", "nov", "dec"]
+    )
+}
+_WEEKDAY_NAMES = {
+    name: index
+    for index, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])
+}
+
+
+def _parse_number(value: str, names: dict) -> int:
+    value = value.lower()
+    if value in names:
+        return names[value]
+
+    return int(value)
+
+
+def _parse_field(field: str, minimum: int, maximum: int, names: dict = None) -> set:
+    names = names or {}
+    values = set()
+
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+            if step < 1:
+                raise ValueError(f"step must be positive. ({field})")
+
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start, end = part.split("-", 1)
+            start, end = _parse_number(start, names), _parse_number(end, names)
+        else:
+            start = _parse_number(part, names)
+            end = maximum if step > 1 else start
+
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f"value is out of range. ({field})")
+
+        values.update(range(start, end + 1, step))
+
+    return values
+
+
+class CronExpression:
+    """Five-field cron expression (minute hour day month weekday) in UTC.
+
+    As in cron, when both day and weekday are restricted a day matches if
+    either of them matches.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron must have 5 fields. ({expression})")
+
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12, _MONTH_NAMES)
+        self.weekdays = {
+            weekday % 7 for weekday in _parse_field(fields[4], 0, 7, _WEEKDAY_NAMES)
+        }
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _match_day(self, moment: datetime) -> bool:
+        day_matched = moment.day in self.days
+        weekday_matched = (moment.weekday() + 1) % 7 in self.weekdays
+
+        if self._any_day or self._any_weekday:
+            return day_matched and weekday_matched
+
+        return day_matched or weekday_matched
+
+    def get_next(self, start: datetime) -> Optional[datetime]:
+        """Returns the first matching minute at or after start."""
+
+        moment = start.replace(second=0, microsecond=0)
+        if moment < start:
+            moment += timedelta(minutes=1)
+
+        for _ in range(_MAX_ITERATIONS):
+            if moment.month not in self.months:
+                year = moment.year + moment.month // 12
+                moment = moment.replace(
+                    year=year, month=moment.month % 12 + 1, day=1, hour=0, minute=0
+                )
+            elif not self._match_day(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            else:
+                minute = min(
+                    (minute for minute in self.minutes if minute >= moment.minute),
+                    default=None,
+                )
+                if minute is not None:
+                    return moment.replace(minute=minute)
+
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _compile_cron(expression: str) -> CronExpression:
+    return CronExpression(expression)
+
+
+def get_spread_offset(key: str, scheduled: dict, window: int) -> int:
+    """Returns a deterministic offset in seconds within the window.
+
+    Only hours schedules are spread, the window is capped below an hour so
+    that a run stays within its hour.
+    """
+
+    if not window or not (scheduled or {}).get("hours"):
+        return 0
+
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return int(digest[:8], 16) % min(window, 3600)
+
+
+def get_next_run_at(
+    scheduled: dict, after: datetime, offset: int = 0
+) -> Optional[datetime]:
+    """Returns the next run time after the given time in UTC.
+
+    Args:
+        scheduled: {
+            'cron': 'str',       # five-field cron expression
+            'interval': 'int',   # every N minutes, counted from the epoch
+            'minutes': 'list',   # minutes of every hour
+            'hours': 'list'      # hours of every day, at minute 0
+        }
+        after: exclusive lower bound
+        offset: seconds added to every run time
+
+    Returns:
+        datetime or None if nothing is scheduled
+    """
+
+    next_run_at = _get_next_slot(scheduled or {}, after - timedelta(seconds=offset))
+    if next_run_at is None:
+        return None
+
+    return next_run_at + timedelta(seconds=offset)
+
+
+def _get_next_slot(scheduled: dict, after: datetime) -> Optional[datetime]:
+    start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+    if scheduled.get("cron"):
+        return _compile_cron(scheduled["cron"]).get_next(start)
+
+    if scheduled.get("interval"):
+        interval = scheduled["interval"]
+        elapsed = int((start - _EPOCH).total_seconds() // 60)
+        return _EPOCH + timedelta(minutes=-(-elapsed // interval) * interval)
+
+    if scheduled.get("minutes"):
+        minutes = ",".join(str(minute) for minute in sorted(scheduled["minutes"]))
+        return _compile_cron(f"{minutes} * * * *").get_next(start)
+
+    if scheduled.get("hours"):
+        hours = ",".join(str(hour) for hour in sorted(scheduled["hours"]))
+        return _compile_cron(f"0 {hours} * * *").get_next(start)
+
+    return None
@@ -0,0 +1,409 @@
+import ast
+
+from spaceone.statistics.lib.formula import Formula, compile_formula
+
+__all__ = ["PlanOptimizer", "get_upstream_columns"]
+
+_KEY_JOIN_TYPES = ["LEFT", "INNER"]
+_POST_GROUP_STAGES = ["sort", "limit", "skip", "page"]
+_FILTER_OPERATORS = {
+    ast.Eq: "eq",
+    ast.NotEq: "not",
+    ast.Lt: "lt",
+    ast.LtE: "lte",
+    ast.Gt: "gt",
+    ast.GtE: "gte",
+    ast.In: "in",
+    ast.NotIn: "not_in",
+}
+_REVERSED_OPERATORS = {"lt": "gt", "lte": "gte", "gt": "lt", "gte": "lte"}
+
+
+def get_upstream_columns(options: dict):
+    """Returns the column names of an upstream stat query, or None if unknown."""
+
+    query = options.get("query") or {}
+    if "distinct" in query:
+        return None
+
+    for stage in reversed(query.get("aggregate", [])):
+        if "group" in stage:
+            group = stage["group"]
+            columns = {key["name"] for key in group.get("keys", []) if "name" in key}
+            columns.update(
+                field["name"] for field in group.get("fields", []) if "name" in field
+            )
+            columns.update(options.get("extend_data", {}).keys())
+            return columns
+
+        if not all(key in _POST_GROUP_STAGES for key in stage):
+            return None
+
+    return None
+
+
+class PlanOptimizer:
+    """Rewrites an aggregate pipeline into an equivalent, cheaper plan.
+
+    Each rule applies one rewrite at a time and the rules are repeated
+    until none of them matches. The original pipeline is not modified.
+    """
+
+    def __init__(self, aggregate: list):
+        self.aggregate = list(aggregate)
+        self.rewrites = []
+
+    def optimize(self) -> list:
+        rules = [
+            self._drop_empty_fill_na,
+            self._drop_duplicate_sort,
+            self._drop_superseded_fill_na,
+            self._fuse_formula_eval,
+            self._move_filter_forward,
+            self._push_down_filter,
+        ]
+
+        max_rewrites = len(self.aggregate) ** 2 + 1
+        while len(self.rewrites) < max_rewrites:
+            if not any(rule() for rule in rules):
+                break
+
+        return self.aggregate
+
+    def _drop_empty_fill_na(self) -> bool:
+        for index, stage in enumerate(self.aggregate):
+            if "fill_na" in stage and len(stage["fill_na"].get("data", {})) == 0:
+                return self._drop(index, "fill_na without data")
+
+        return False
+
+    def _drop_duplicate_sort(self) -> bool:
+        for index in range(1, len(self.aggregate)):
+            stage = self.aggregate[index]
+            previous_stage = self.aggregate[index - 1]
+            if "sort" in stage and stage == previous_stage:
+                return self._drop(index, "same sort as the previous stage")
+
+        return False
+
+    def _drop_superseded_fill_na(self) -> bool:
+        for index, stage in enumerate(self.aggregate):
+            if "fill_na" not in stage:
+                continue
+
+            data = stage["fill_na"].get("data", {})
+            for next_index in range(index + 1, len(self.aggregate)):
+                next_stage = self.aggregate[next_index]
+
+                if "fill_na" in next_stage:
+                    next_data = next_stage["fill_na"].get("data", {})
+                    if all(
+                        key in next_data and next_data[key] == value
+                        for key, value in data.items()
+                    ):
+                        return self._drop(
+                            index, f"superseded by the fill_na at stage {next_index}"
+                        )
+                    break
+
+                if self._reads_columns(next_stage, set(data.keys())):
+                    break
+
+        return False
+
+    def _fuse_formula_eval(self) -> bool:
+        for index in range(1, len(self.aggregate)):
+            previous_formula = self._get_formula(self.aggregate[index - 1], "eval")
+            formula = self._get_formula(self.aggregate[index], "eval")
+
+            if previous_formula is None or formula is None:
+                continue
+
+            if previous_formula.is_assignment and formula.is_assignment:
+                self.aggregate[index - 1 : index + 1] = [
+                    {
+                        "formula": {
+                            "eval": f"{previous_formula.expression}\n"
+                            f"{formula.expression}"
+                        }
+                    }
+                ]
+                self.rewrites.append(f"fuse formula.eval at stage {index - 1}, {index}")
+                return True
+
+        return False
+
+    def _move_filter_forward(self) -> bool:
+        for index in range(1, len(self.aggregate)):
+            formula = self._get_formula(self.aggregate[index], "query")
+            if formula is None:
+                continue
+
+            previous_stage = self.aggregate[index - 1]
+            if self._can_filter_before(previous_stage, formula, index - 1):
+                self.aggregate[index - 1], self.aggregate[index] = (
+                    self.aggregate[index],
+                    self.aggregate[index - 1],
+                )
+                self.rewrites.append(
+                    f"move formula.query at stage {index} before stage {index - 1}"
+                )
+                return True
+
+        return False
+
+    def _push_down_filter(self) -> bool:
+        # Conditions on group keys select the same groups when they are
+        # applied to the upstream documents before grouping. The filter
+        # stage itself is kept, so the result does not change. This only
+        # holds if the upstream returns every group, so nothing may limit
+        # the groups after the group stage.
+        if len(self.aggregate) < 2:
+            return False
+
+        formula = self._get_formula(self.aggregate[1], "query")
+        if formula is None:
+            return False
+
+        options = self.aggregate[0]["query"]
+        key_map = self._get_group_key_map(options)
+        if not key_map:
+            return False
+
+        query = options["query"]
+        query_filter = list(query.get("filter", []))
+        pushed_count = 0
+
+        for condition in self._get_filter_conditions(formula):
+            if condition["k"] not in key_map:
+                continue
+
+            condition["k"] = key_map[condition["k"]]
+            if condition not in query_filter:
+                query_filter.append(condition)
+                pushed_count += 1
+
+        if pushed_count == 0:
+            return False
+
+        self.aggregate[0] = {
+            "query": dict(options, query=dict(query, filter=query_filter))
+        }
+        self.rewrites.append(
+            f"push down {pushed_count} condition(s) of formula.query "
+            f"into the query at stage 0"
+        )
+        return True
+
+    @staticmethod
+    def _get_group_key_map(options: dict) -> dict:
+        query = options.get("query") or {}
+        aggregate = query.get("aggregate", [])
+        if "distinct" in query or "page" in query:
+            return {}
+
+        if len(aggregate) != 1 or "group" not in aggregate[0]:
+            return {}
+
+        group = aggregate[0]["group"]
+        extend_keys = set(options.get("extend_data", {}).keys())
+        field_names = {field.get("name") for field in group.get("fields", [])}
+
+        key_map = {}
+        for key in group.get("keys", []):
+            name = key.get("name")
+            if set(key.keys()) != {"key", "name"}:
+                continue
+
+            if name in extend_keys or name in field_names:
+                continue
+
+            key_map[name] = key["key"]
+
+        return key_map
+
+    @classmethod
+    def _get_filter_conditions(cls, formula: Formula) -> list:
+        if len(formula.tree.body) != 1:
+            return []
+
+        conditions = []
+        for node in cls._split_conjunction(formula.tree.body[0].value):
+            condition = cls._make_filter_condition(node, formula)
+            if condition is not None:
+                conditions.append(condition)
+
+        return conditions
+
+    @classmethod
+    def _split_conjunction(cls, node: ast.AST) -> list:
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            nodes = []
+            for value in node.values:
+                nodes.extend(cls._split_conjunction(value))
+            return nodes
+
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd):
+            return cls._split_conjunction(node.left) + cls._split_conjunction(
+                node.right
+            )
+
+        return [node]
+
+    @classmethod
+    def _make_filter_condition(cls, node: ast.AST, formula: Formula):
+        if not isinstance(node, ast.Compare) or len(node.ops) != 1:
+            return None
+
+        operator = _FILTER_OPERATORS.get(type(node.ops[0]))
+        left, right = node.left, node.comparators[0]
+        if operator is None:
+            return None
+
+        if not isinstance(left, ast.Name) and operator in _REVERSED_OPERATORS:
+            left, right = right, left
+            operator = _REVERSED_OPERATORS[operator]
+        elif not isinstance(left, ast.Name) and operator in ["eq", "not"]:
+            left, right = right, left
+
+        if not isinstance(left, ast.Name):
+            return None
+
+        value = cls._get_constant(right)
+        if value is None:
+            return None
+
+        if operator in ["in", "not_in"] and not isinstance(value, list):
+            return None
+
+        if operator not in ["in", "not_in"] and isinstance(value, list):
+            return None
+
+        return {"k": formula.get_name(left), "v": value, "o": operator}
+
+    @classmethod
+    def _get_constant(cls, node: ast.AST):
+        if isinstance(node, (ast.List, ast.Tuple)):
+            values = [cls._get_constant(element) for element in node.elts]
+            if any(value is None for value in values):
+                return None
+            return values
+
+        if isinstance(node, ast.Constant) and isinstance(
+            node.value, (str, int, float, bool)
+        ):
+            return node.value
+
+        if (
+            isinstance(node, ast.UnaryOp)
+            and isinstance(node.op, ast.USub)
+            and isinstance(node.operand, ast.Constant)
+            and isinstance(node.operand.value, (int, float))
+        ):
+            return -node.operand.value
+
+        return None
+
+    def _can_filter_before(self, stage: dict, formula: Formula, index: int) -> bool:
+        # A filter is never moved before an eval. If it leaves no rows, the
+        # eval is skipped and its columns would be missing from the output.
+        if "sort" in stage:
+            return True
+
+        # Filtering the left side of a key join keeps the same rows,
+        # as long as every filtered column comes from the left side.
+        if "join" in stage:
+            options = stage["join"]
+            join_keys = options.get("keys")
+            join_type = options.get("type", "LEFT")
+            if not join_keys or join_type not in _KEY_JOIN_TYPES:
+                return False
+
+            base_columns = self.get_columns(index)
+            join_columns = get_upstream_columns(options)
+            if base_columns is None or join_columns is None:
+                return False
+
+            right_columns = join_columns - set(join_keys)
+            return formula.columns.issubset(
+                base_columns
+            ) and formula.columns.isdisjoint(right_columns)
+
+        return False
+
+    def get_columns(self, stop: int):
+        """Returns the columns produced by the stages before 'stop', if known."""
+
+        columns = None
+        for stage in self.aggregate[:stop]:
+            if "query" in stage:
+                columns = get_upstream_columns(stage["query"])
+
+            elif "join" in stage or "concat" in stage:
+                options = stage.get("join") or stage.get("concat")
+                upstream_columns = get_upstream_columns(options)
+                if columns is None or upstream_columns is None:
+                    return None
+
+                join_keys = set(options.get("keys") or [])
+                if "join" in stage and not columns.isdisjoint(
+                    upstream_columns - join_keys
+                ):
+                    return None
+
+                columns = columns | upstream_columns
+
+            elif "formula" in stage:
+                formula = self._get_formula(stage, "eval")
+                if formula is not None:
+                    if not formula.is_assignment:
+                        return None
+
+                    columns = columns | set(formula.targets)
+
+            if columns is None:
+                return None
+
+        return columns
+
+    def _reads_columns(self, stage: dict, columns: set) -> bool:
+        if "sort" in stage:
+            return any(option.get("key") in columns for option in stage["sort"])
+
+        if "formula" in stage:
+            formula = self._get_formula(stage, "eval") or self._get_formula(
+                stage, "query"
+            )
+            if formula is None:
+                return True
+
+            if "eval" in stage["formula"] and not formula.is_assignment:
+                return True
+
+            return not formula.columns.isdisjoint(columns)
+
+        if "join" in stage:
+            options = stage["join"]
+            join_keys = options.get("keys")
+            join_columns = get_upstream_columns(options)
+            if not join_keys or join_columns is None:
+                return True
+
+            return not columns.isdisjoint(join_columns) or not columns.isdisjoint(
+                join_keys
+            )
+
+        return False
+
+    @staticmethod
+    def _get_formula(stage: dict, mode: str):
+        if "formula" in stage and mode in stage["formula"]:
+            return compile_formula(stage["formula"][mode], mode)
+
+        return None
+
+    def _drop(self, index: int, reason: str) -> bool:
+        stage = self.aggregate.pop(index)
+        operator = list(stage.keys())[0]
+        self.rewrites.append(f"drop {operator} at stage {index} ({reason})")
+        return True
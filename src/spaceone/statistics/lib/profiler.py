@@ -0,0 +1,77 @@
+import json
+import logging
+import time
+
+import numpy as np
+
+__all__ = ["PipelineProfiler"]
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PipelineProfiler:
+    """Collects per-stage timings and DataFrame sizes of an aggregate pipeline."""
+
+    def __init__(self):
+        self._started_at = time.perf_counter()
+        self._upstream = {}
+        self._stages = []
+        self._fetch_ms = 0.0
+        self._plan = None
+        self._rewrites = []
+
+    def set_plan(self, aggregate: list, rewrites: list) -> None:
+        self._plan = aggregate
+        self._rewrites = rewrites
+
+    def add_upstream(self, index: int, elapsed_ms: float) -> None:
+        self._upstream[index] = round(elapsed_ms, 3)
+
+    def add_fetch(self, elapsed_ms: float) -> None:
+        self._fetch_ms = round(elapsed_ms, 3)
+
+    def add_stage(self, index, operator: str, started_at: float, input_df, output_df):
+        stage = {
+            "stage": index,
+            "operator": operator,
+            "duration_ms": round((time.perf_counter() - started_at) * 1000, 3),
+            "input_rows": self._get_row_count(input_df),
+        }
+
+        if index in self._upstream:
+            stage["upstream_ms"] = self._upstream[index]
+
+        stage.update(
+            {
+                "output_rows": self._get_row_count(output_df),
+                "columns": self._get_column_count(output_df),
+                "memory_bytes": self._get_memory_usage(output_df),
+            }
+        )
+
+        _LOGGER.info(f"[PipelineProfiler] stage: {json.dumps(stage)}")
+        self._stages.append(stage)
+
+    def to_dict(self) -> dict:
+        profile = {
+            "stages": self._stages,
+            "fetch_ms": self._fetch_ms,
+            "total_ms": round((time.perf_counter() - self._started_at) * 1000, 3),
+        }
+
+        if self._plan is not None:
+            profile["plan"] = {"aggregate": self._plan, "rewrites": self._rewrites}
+
+        return profile
+
+    @staticmethod
+    def _get_row_count(df) -> int:
+        return 0 if df is None else len(df)
+
+    @staticmethod
+    def _get_column_count(df) -> int:
+        return len(df.columns) if hasattr(df, "columns") else 1
+
+    @staticmethod
+    def _get_memory_usage(df) -> int:
+        return int(np.sum(df.memory_usage(index=True, deep=True)))
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from numbers import Number
+from typing import Iterable, Tuple
+
+from spaceone.statistics.lib.formula import compile_formula
+
+__all__ = ["ROLLUP_PERIODS", "get_period_range", "get_metric_columns", "rollup_rows"]
+
+ROLLUP_PERIODS = ["DAILY", "WEEKLY"]
+
+
+def get_period_range(created_at: datetime, period: str) -> Tuple[datetime, datetime]:
+    """Returns the [start, end) range of the rollup period containing created_at.
+
+    Weekly periods start on Monday.
+    """
+
+    start = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if period == "WEEKLY":
+        start -= timedelta(days=start.weekday())
+        return start, start + timedelta(days=7)
+
+    return start, start + timedelta(days=1)
+
+
+def _is_metric(value) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def get_metric_columns(aggregate: list) -> list:
+    """Returns the metric columns of a schedule from its aggregate options.
+
+    Metrics are the fields of group and count stages of the upstream queries
+    and the targets of formula evals, the other columns form the key. They
+    are decided once per schedule, so that every period has the same key.
+    """
+
+    metric_columns = {}
+    for stage in aggregate or []:
+        if "formula" in stage:
+            if stage["formula"].get("eval"):
+                formula = compile_formula(stage["formula"]["eval"], "eval")
+                metric_columns.update(dict.fromkeys(formula.targets))
+
+            continue
+
+        options = stage.get("query") or stage.get("join") or stage.get("concat")
+        query = (options or {}).get("query") or {}
+
+        for query_stage in query.get("aggregate", []):
+            if "group" in query_stage:
+                for field in query_stage["group"].get("fields", []):
+                    if field.get("name"):
+                        metric_columns[field["name"]] = None
+            elif "count" in query_stage:
+                if query_stage["count"].get("name"):
+                    metric_columns[query_stage["count"]["name"]] = None
+
+    return list(metric_columns)
+
+
+def rollup_rows(rows: Iterable[Tuple[datetime, dict]], metric_columns: list) -> list:
+    """Aggregates history rows of one period into rollups.
+
+    Metric columns are summarized as last, avg and max, values that are not
+    numbers are skipped. The other columns form the key of a rollup.
+
+    Args:
+        rows: (created_at, values) pairs
+        metric_columns: columns to summarize
+
+    Returns:
+        list of {'key': dict, 'values': dict, 'sample_count': int}
+    """
+
+    rows = sorted(rows, key=lambda row: row[0])
+
+    rollups = {}
+    for _, values in rows:
+        key = {
+            column: value
+            for column, value in values.items()
+            if column not in metric_columns
+        }
+        rollup_key = tuple(
+            sorted((column, str(value)) for column, value in key.items())
+        )
+
+        rollup = rollups.get(rollup_key)
+        if rollup is None:
+            rollup = rollups[rollup_key] = {
+                "key": key,
+                "metrics": {},
+                "sample_count": 0,
+            }
+
+        rollup["sample_count"] += 1
+
+        for column in metric_columns:
+            value = values.get(column)
+            if not _is_metric(value):
+                continue
+
+            metric = rollup["metrics"].get(column)
+            if metric is None:
+                rollup["metrics"][column] = [value, value, value, 1]
+            else:
+                metric[0] = value
+                metric[1] += value
+                metric[2] = max(metric[2], value)
+                metric[3] += 1
+
+    return [
+        {
+            "key": rollup["key"],
+            "values": {
+                column: {"last": last, "avg": total / count, "max": maximum}
+                for column, (last, total, maximum, count) in rollup["metrics"].items()
+            },
+            "sample_count": rollup["sample_count"],
+        }
+        for rollup in rollups.values()
+    ]
@@ -2,3 +2,4 @@ from spaceone.statistics.manager.resource_manager import ResourceManager
 from spaceone.statistics.manager.schedule_manager import ScheduleManager
 from spaceone.statistics.manager.history_manager import HistoryManager
 from spaceone.statistics.manager.identity_manager import IdentityManager
+from spaceone.statistics.manager.history_rollup_manager import HistoryRollupManager
@@ -1,47 +1,436 @@
 import logging
+import time
 from datetime import datetime
-from typing import Tuple
+from typing import Iterator, Tuple, Union
 from mongoengine import QuerySet
 
+from spaceone.core import config, utils
+from spaceone.core.error import *
 from spaceone.core.manager import BaseManager
+from spaceone.statistics.lib.keyset import (
+    decode_cursor,
+    encode_cursor,
+    make_cursor_query,
+)
 
 from spaceone.statistics.model import Schedule
 from spaceone.statistics.model.history_model import History
+from spaceone.statistics.model.history_bucket_model import HistoryBucket, HistoryView
+from spaceone.statistics.model.history_run_model import HistoryRun
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class HistoryManager(BaseManager):
+    _has_buckets = False
+    _buckets_checked_at = None
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.history_model: History = self.locator.get_model("History")
+        self.history_run_model: HistoryRun = self.locator.get_model("HistoryRun")
+        self.history_bucket_model: HistoryBucket = self.locator.get_model(
+            "HistoryBucket"
+        )
+        self.history_view_model: HistoryView = self.locator.get_model("HistoryView")
+        self.bucket_storage = config.get_global("HISTORY_BUCKET_STORAGE", False)
 
     def create_history(
-        self, schedule_vo, topic: str, results: list, domain_id: str
-    ) -> None:
-        def _rollback(vo: History):
-            _LOGGER.info(f"[create_history._rollback] " f"Delete history : {vo.topic}")
-            vo.delete()
+        self, schedule_vo, topic: str, results: list, domain_id: str, run_id=None
+    ) -> str:
+        def _rollback(rollback_run_id: str):
+            _LOGGER.info(
+                f"[create_history._rollback] "
+                f"Delete history : {topic} ({rollback_run_id})"
+            )
+            self.delete_history_by_run_id(rollback_run_id)
 
+        run_id = run_id or utils.generate_id("run")
         created_at = datetime.utcnow()
 
+        # The rollback is registered first so that partially inserted
+        # batches are also removed.
+        self.transaction.add_rollback(_rollback, run_id)
+
+        _LOGGER.debug(
+            f"[create_history] create history: {topic} "
+            f"(run_id = {run_id}, count = {len(results)}, "
+            f"bucket_storage = {self.bucket_storage})"
+        )
+
+        if self.bucket_storage:
+            self._insert_history_buckets(
+                schedule_vo, topic, results, domain_id, run_id, created_at
+            )
+        else:
+            self._insert_history(
+                schedule_vo, topic, results, domain_id, run_id, created_at
+            )
+
+        return run_id
+
+    def _insert_history(
+        self,
+        schedule_vo,
+        topic: str,
+        results: list,
+        domain_id: str,
+        run_id: str,
+        created_at: datetime,
+    ) -> None:
+        batch_size = config.get_global("HISTORY_INSERT_BATCH_SIZE", 1000)
+        collection = self.history_model._get_collection()
+        for start in range(0, len(results), batch_size):
+            documents = []
+            for values in results[start : start + batch_size]:
+                history_vo = self.history_model(
+                    topic=topic,
+                    schedule=schedule_vo,
+                    values=values,
+                    created_at=created_at,
+                    domain_id=domain_id,
+                    run_id=run_id,
+                )
+                history_vo.validate()
+                documents.append(history_vo.to_mongo())
+
+            collection.insert_many(documents, ordered=False)
+
+    def _insert_history_buckets(
+        self,
+        schedule_vo,
+        topic: str,
+        results: list,
+        domain_id: str,
+        run_id: str,
+        created_at: datetime,
+    ) -> None:
+        bucket_size = config.get_global("HISTORY_BUCKET_SIZE", 1000)
+        collection = self.history_bucket_model._get_collection()
+
+        documents = []
+        for start in range(0, len(results), bucket_size):
+            columns, rows = self._pack_rows(results[start : start + bucket_size])
+            bucket_vo = self.history_bucket_model(
+                topic=topic,
+                schedule=schedule_vo,
+                columns=columns,
+                rows=rows,
+                row_count=len(rows),
+                created_at=created_at,
+                domain_id=domain_id,
+                run_id=run_id,
+            )
+            bucket_vo.validate()
+            documents.append(bucket_vo.to_mongo())
+
+        if documents:
+            collection.insert_many(documents, ordered=False)
+
+    @staticmethod
+    def _pack_rows(results: list) -> Tuple[list, list]:
+        # Stat results share the same keys, so each bucket stores the key names
+        # once. A key missing from a row is stored as null.
+        columns = {}
         for values in results:
-            history_data = {
-                "topic": topic,
+            columns.update(dict.fromkeys(values))
+
+        columns = list(columns)
+        rows = [[values.get(column) for column in columns] for values in results]
+        return columns, rows
+
+    def delete_history_by_run_id(self, run_id: str) -> None:
+        self.history_model.filter(run_id=run_id).delete()
+        self.history_bucket_model.filter(run_id=run_id).delete()
+
+    def get_oldest_history_created_at(
+        self, topic: str, domain_id: str, before: datetime
+    ) -> Union[datetime, None]:
+        oldest = None
+        for model in [self.history_model, self.history_bucket_model]:
+            history_vo = (
+                model.filter(topic=topic, domain_id=domain_id, created_at__lt=before)
+                .order_by("created_at")
+                .only("created_at")
+                .first()
+            )
+
+            if history_vo and (oldest is None or history_vo.created_at < oldest):
+                oldest = history_vo.created_at
+
+        return oldest
+
+    def iter_history_values(
+        self, topic: str, domain_id: str, start: datetime, end: datetime
+    ) -> Iterator[Tuple[datetime, dict]]:
+        conditions = {
+            "topic": topic,
+            "domain_id": domain_id,
+            "created_at__gte": start,
+            "created_at__lt": end,
+        }
+
+        for history in (
+            self.history_model.filter(**conditions)
+            .only("created_at", "values")
+            .as_pymongo()
+        ):
+            yield history["created_at"], history.get("values", {})
+
+        for bucket in (
+            self.history_bucket_model.filter(**conditions)
+            .only("created_at", "columns", "rows")
+            .as_pymongo()
+        ):
+            columns = bucket.get("columns", [])
+            for row in bucket.get("rows", []):
+                yield bucket["created_at"], dict(zip(columns, row))
+
+    def delete_history_between(
+        self, topic: str, domain_id: str, start: datetime, end: datetime
+    ) -> None:
+        for model in [self.history_model, self.history_bucket_model]:
+            model.filter(
+                topic=topic,
+                domain_id=domain_id,
+                created_at__gte=start,
+                created_at__lt=end,
+            ).delete()
+
+    def _read_buckets(self) -> bool:
+        # Buckets written while HISTORY_BUCKET_STORAGE was on stay readable
+        # after it is turned off.
+        if self.bucket_storage or HistoryManager._has_buckets:
+            return True
+
+        # Until a bucket exists, the collection is looked up at most once
+        # per HISTORY_BUCKET_CHECK_INTERVAL instead of on every read.
+        now = time.monotonic()
+        checked_at = HistoryManager._buckets_checked_at
+        interval = config.get_global("HISTORY_BUCKET_CHECK_INTERVAL", 60)
+        if checked_at is not None and now - checked_at < interval:
+            return False
+
+        HistoryManager._buckets_checked_at = now
+        collection = self.history_bucket_model._get_collection()
+        HistoryManager._has_buckets = collection.find_one({}, {"_id": 1}) is not None
+        return HistoryManager._has_buckets
+
+    def _get_read_model(self):
+        if self._read_buckets():
+            return self.history_view_model
+
+        return self.history_model
+
+    def _aggregate_union(self, match: dict, stages: list, **options):
+        pipeline = self.history_view_model.get_union_pipeline(
+            self.history_bucket_model._get_collection_name(), match
+        )
+        options.setdefault("allowDiskUse", True)
+        return self.history_model._get_collection().aggregate(
+            pipeline + stages, **options
+        )
+
+    def _count_union(self, match: dict) -> int:
+        for result in self._aggregate_union(match, [{"$count": "total_count"}]):
+            return result["total_count"]
+
+        return 0
+
+    def list_history(self, query: dict) -> Tuple[Union[QuerySet, list], int]:
+        history_model = self._get_read_model()
+        if history_model is self.history_model:
+            return history_model.query(**query)
+
+        match = self._make_match(history_model, query)
+
+        sort = {"created_at": -1}
+        if query.get("sort"):
+            sort = {
+                sort_option["key"]: -1 if sort_option.get("desc", False) else 1
+                for sort_option in query["sort"]
+            }
+            sort["_id"] = 1
+
+        stages = [{"$sort": sort}]
+
+        page = query.get("page", {})
+        if page.get("limit", 0) > 0:
+            start = max(page.get("start", 1), 1)
+            stages += [{"$skip": start - 1}, {"$limit": page["limit"]}]
+
+        if query.get("only"):
+            stages.append({"$project": dict.fromkeys(list(sort) + query["only"], 1)})
+
+        history_vos = [
+            history_model._from_son(history)
+            for history in self._aggregate_union(match, stages)
+        ]
+        return history_vos, self._count_union(match)
+
+    def scan_history(
+        self,
+        query: dict,
+        cursor: str = None,
+        limit: int = 1000,
+        include_total_count: bool = False,
+    ) -> Tuple[list, Union[str, None], Union[int, None]]:
+        history_model = self._get_read_model()
+        filter_query = self._make_match(history_model, query)
+
+        scan_query = filter_query
+        if cursor:
+            try:
+                decoded_cursor = decode_cursor(cursor)
+            except ValueError as e:
+                raise ERROR_INVALID_PARAMETER(key="cursor", reason=str(e))
+
+            # The created_at bound is implied by the cursor query, but unlike
+            # it, the bound can be applied to buckets before they are unwound.
+            scan_query = {
+                "$and": [
+                    filter_query,
+                    {"created_at": {"$lte": decoded_cursor["created_at"]}},
+                    make_cursor_query(decoded_cursor),
+                ]
+            }
+
+        # The sort key is always loaded, since the cursor is built from it.
+        sort = {"created_at": -1, "_id": -1}
+        if history_model is self.history_view_model:
+            sort["row_index"] = -1
+
+        only = query.get("only")
+        if history_model is self.history_model:
+            history_vos = history_model.objects(__raw__=scan_query).order_by(
+                *[f"-{key}" for key in sort]
+            )
+
+            if only:
+                history_vos = history_vos.only(*set(list(only) + list(sort)))
+
+            history_vos = list(history_vos.limit(limit + 1))
+        else:
+            stages = [{"$sort": sort}, {"$limit": limit + 1}]
+            if only:
+                stages.append({"$project": dict.fromkeys(list(sort) + only, 1)})
+
+            history_vos = [
+                history_model._from_son(history)
+                for history in self._aggregate_union(scan_query, stages)
+            ]
+
+        next_cursor = None
+        if len(history_vos) > limit:
+            history_vos = history_vos[:limit]
+            last_vo = history_vos[-1]
+            next_cursor = encode_cursor(
+                last_vo.created_at, last_vo.id, getattr(last_vo, "row_index", None)
+            )
+
+        total_count = None
+        if include_total_count:
+            if history_model is self.history_model:
+                total_count = history_model.objects(__raw__=filter_query).count()
+            else:
+                total_count = self._count_union(filter_query)
+
+        return history_vos, next_cursor, total_count
+
+    def iter_history_batches(
+        self, query: dict, batch_size: int = 1000
+    ) -> Iterator[list]:
+        # The filter and cursor are built here, so that invalid queries fail
+        # within the transaction and only the batches are read lazily.
+        history_model = self._get_read_model()
+        filter_query = self._make_match(history_model, query)
+
+        if history_model is self.history_model:
+            cursor = (
+                history_model.objects(__raw__=filter_query)
+                .order_by("-created_at")
+                .only("topic", "values", "created_at")
+                .as_pymongo()
+                .batch_size(batch_size)
+            )
+        else:
+            cursor = self._aggregate_union(
+                filter_query,
+                [
+                    {"$sort": {"created_at": -1}},
+                    {"$project": {"topic": 1, "values": 1, "created_at": 1}},
+                ],
+                batchSize=batch_size,
+            )
+
+        return self._iter_batches(cursor, batch_size)
+
+    @staticmethod
+    def _iter_batches(cursor, batch_size: int) -> Iterator[list]:
+        rows = []
+        for row in cursor:
+            rows.append(row)
+            if len(rows) >= batch_size:
+                yield rows
+                rows = []
+
+        if rows:
+            yield rows
+
+    @staticmethod
+    def _make_match(history_model, query: dict) -> dict:
+        # Same conversion as query(), the cursor bound is added on top of it.
+        filter_query = history_model._make_filter(
+            query.get("filter", []), query.get("filter_or", []), None
+        )
+        return filter_query.to_query(history_model) if filter_query else {}
+
+    def stat_history(self, query: dict) -> dict:
+        history_model = self._get_read_model()
+        if history_model is self.history_model:
+            return history_model.stat(**query)
+
+        history_union = _HistoryUnion(self, self._make_match(history_model, query))
+        page = query.get("page", {})
+
+        if query.get("aggregate"):
+            return history_model._stat_aggregate(
+                history_union, query["aggregate"], page, None, True, "dict"
+            )
+        elif query.get("distinct"):
+            return history_model._stat_distinct(history_union, query["distinct"], page)
+
+        raise ERROR_REQUIRED_PARAMETER(key="aggregate")
+
+    def create_history_run(self, schedule_vo, domain_id: str) -> HistoryRun:
+        # Runs are kept when the transaction is rolled back,
+        # so that failed executions remain visible.
+        return self.history_run_model.create(
+            {
+                "topic": schedule_vo.topic,
                 "schedule": schedule_vo,
-                "values": values,
-                "created_at": created_at,
                 "domain_id": domain_id,
             }
+        )
 
-            _LOGGER.debug(f"[create_history] create history: {history_data}")
+    @staticmethod
+    def update_history_run_by_vo(
+        params: dict, history_run_vo: HistoryRun
+    ) -> HistoryRun:
+        return history_run_vo.update(params)
 
-            history_vo: History = self.history_model.create(history_data)
 
-            self.transaction.add_rollback(_rollback, history_vo)
+class _HistoryUnion:
+    """Stands in for a QuerySet of HistoryView in the stat helpers of the model."""
 
-    def list_history(self, query: dict) -> Tuple[QuerySet, int]:
-        return self.history_model.query(**query)
+    def __init__(self, history_mgr: HistoryManager, match: dict):
+        self._history_mgr = history_mgr
+        self._match = match
 
-    def stat_history(self, query: dict) -> dict:
-        return self.history_model.stat(**query)
+    def aggregate(self, pipeline: list, **options):
+        return self._history_mgr._aggregate_union(self._match, pipeline, **options)
+
+    def distinct(self, key: str) -> list:
+        return [
+            result["_id"] for result in self.aggregate([{"$group": {"_id": f"${key}"}}])
+        ]
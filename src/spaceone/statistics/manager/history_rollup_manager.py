@@ -0,0 +1,64 @@
+import logging
+from datetime import datetime
+
+from spaceone.core.manager import BaseManager
+from spaceone.statistics.model.history_rollup_model import HistoryRollup
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HistoryRollupManager(BaseManager):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.history_rollup_model: HistoryRollup = self.locator.get_model(
+            "HistoryRollup"
+        )
+
+    def replace_rollups(
+        self,
+        schedule_vo,
+        period: str,
+        period_start: datetime,
+        rollups: list,
+        domain_id: str,
+    ) -> None:
+        topic = schedule_vo.topic
+
+        # Rolling up the same period again replaces its rollups,
+        # so an interrupted retention run can be retried.
+        self.history_rollup_model.filter(
+            topic=topic, period=period, period_start=period_start, domain_id=domain_id
+        ).delete()
+
+        _LOGGER.debug(
+            f"[replace_rollups] create rollups: {topic} "
+            f"({period} {period_start.isoformat()}, count = {len(rollups)})"
+        )
+
+        documents = []
+        for rollup in rollups:
+            rollup_vo = self.history_rollup_model(
+                topic=topic,
+                schedule=schedule_vo,
+                period=period,
+                period_start=period_start,
+                key=rollup["key"],
+                values=rollup["values"],
+                sample_count=rollup["sample_count"],
+                domain_id=domain_id,
+                created_at=datetime.utcnow(),
+            )
+            rollup_vo.validate()
+            documents.append(rollup_vo.to_mongo())
+
+        if documents:
+            self.history_rollup_model._get_collection().insert_many(
+                documents, ordered=False
+            )
+
+    def delete_rollups_before(
+        self, topic: str, period_start: datetime, domain_id: str
+    ) -> None:
+        self.history_rollup_model.filter(
+            topic=topic, period_start__lt=period_start, domain_id=domain_id
+        ).delete()
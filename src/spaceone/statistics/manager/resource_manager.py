@@ -1,11 +1,22 @@
+import contextlib
+import hashlib
 import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 
+from spaceone.core import cache, config, utils
 from spaceone.core.auth.jwt.jwt_util import JWTUtil
 from spaceone.core.manager import BaseManager
 from spaceone.core.connector.space_connector import SpaceConnector
 from spaceone.statistics.error import *
+from spaceone.statistics.lib.formula import compile_formula
+from spaceone.statistics.lib.plan_optimizer import PlanOptimizer
+from spaceone.statistics.lib.profiler import PipelineProfiler
+from spaceone.statistics.lib.single_flight import SingleFlight
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,28 +29,191 @@ _SUPPORTED_AGGREGATE_OPERATIONS = [
     "formula",
     "fill_na",
 ]
+_UPSTREAM_OPERATIONS = ["query", "join", "concat"]
+_STAT_SINGLE_FLIGHT = SingleFlight()
+_SUPPORTED_OUTPUT_FORMATS = ["RECORDS", "COLUMNAR"]
+
+_LOCAL_CACHE_LOCK = threading.Lock()
+_UPSTREAM_EXECUTOR = None
+_UPSTREAM_EXECUTOR_LOCK = threading.Lock()
+
+
+def _is_local_cache(alias: str) -> bool:
+    return config.get_global("CACHES", {}).get(alias, {}).get("engine") == "LocalCache"
+
+
+def _get_cache_lock(alias: str):
+    # LocalCache is not thread-safe and is shared by the upstream fetch threads.
+    return _LOCAL_CACHE_LOCK if _is_local_cache(alias) else contextlib.nullcontext()
+
+
+def _get_upstream_executor() -> ThreadPoolExecutor:
+    # One pool is shared by all stat executions of the process, so threads
+    # are reused and concurrent upstream queries are bounded by
+    # STAT_QUERY_MAX_WORKERS as a whole.
+    global _UPSTREAM_EXECUTOR
+
+    with _UPSTREAM_EXECUTOR_LOCK:
+        if _UPSTREAM_EXECUTOR is None:
+            _UPSTREAM_EXECUTOR = ThreadPoolExecutor(
+                max_workers=config.get_global("STAT_QUERY_MAX_WORKERS", 1),
+                thread_name_prefix="stat-upstream",
+            )
+
+    return _UPSTREAM_EXECUTOR
 
 
 class ResourceManager(BaseManager):
-    def stat(self, aggregate: list, page: dict, domain_id: str = None) -> dict:
-        results = self._execute_aggregate_operations(aggregate, domain_id)
-        return self._page(page, results)
+    def stat(
+        self,
+        aggregate: list,
+        page: dict,
+        domain_id: str = None,
+        output_format: str = "RECORDS",
+        profile: bool = False,
+        shared_results: dict = None,
+    ) -> dict:
+        if output_format not in _SUPPORTED_OUTPUT_FORMATS:
+            raise ERROR_INVALID_PARAMETER_TYPE(
+                key="format", type=_SUPPORTED_OUTPUT_FORMATS
+            )
 
-    def _execute_aggregate_operations(self, aggregate: list, domain_id: str = None):
-        df = None
+        profiler = None
+        if profile or config.get_global("STAT_PROFILE_LOG", False):
+            profiler = PipelineProfiler()
+
+        aggregate = self._prepare_aggregate(aggregate, profiler)
+
+        # A final sort is applied together with the page,
+        # so only the requested top rows are sorted and serialized.
+        aggregate, sort_options = self._split_final_sort(aggregate)
+
+        if config.get_global("STAT_SINGLE_FLIGHT", False) and profiler is None:
+            # Concurrent identical pipelines share one execution,
+            # and each caller slices its own page from the shared result.
+            fingerprint = self._make_pipeline_fingerprint(aggregate, domain_id)
+            df = _STAT_SINGLE_FLIGHT.do(
+                fingerprint,
+                self._execute_aggregate_operations,
+                aggregate,
+                domain_id,
+                shared_results=shared_results,
+            )
+        else:
+            df = self._execute_aggregate_operations(
+                aggregate, domain_id, profiler, shared_results
+            )
+
+        started_at = time.perf_counter()
+        paged_df = self._page(page, df, sort_options)
 
+        if profiler is not None:
+            operator = "page" if sort_options is None else "sort+page"
+            profiler.add_stage(len(aggregate), operator, started_at, df, paged_df)
+
+        started_at = time.perf_counter()
+        response = {"total_count": len(df)}
+        response.update(self._serialize(paged_df, output_format))
+
+        if profiler is not None:
+            profiler.add_stage(
+                len(aggregate) + 1, "serialize", started_at, paged_df, paged_df
+            )
+            if profile:
+                response["profile"] = profiler.to_dict()
+
+        return response
+
+    def prefetch(self, aggregates: list, domain_id: str = None) -> dict:
+        """Fetches the distinct upstream requests of several pipelines at once.
+
+        The returned results can be passed to stat() as shared_results.
+        Pipelines or requests that fail are left out, so each of them
+        fails on its own when it is executed.
+        """
+
+        upstream_requests = {}
+        for aggregate in aggregates:
+            try:
+                aggregate = self._prepare_aggregate(aggregate)
+                for index, operator, options in self._iter_upstream_stages(aggregate):
+                    request_key = self._make_upstream_request_key(options)
+                    if request_key not in upstream_requests:
+                        connector, resource = self._get_stat_connector(
+                            options, operator
+                        )
+                        upstream_requests[request_key] = (connector, resource, options)
+            except Exception as e:
+                _LOGGER.warning(f"[prefetch] skip invalid aggregate: {e}")
+
+        shared_results = self._fetch_upstream_requests(
+            upstream_requests, domain_id, ignore_errors=True
+        )
+
+        _LOGGER.debug(
+            f"[prefetch] fetched {len(shared_results)} distinct upstream queries "
+            f"for {len(aggregates)} pipelines"
+        )
+        return shared_results
+
+    def _prepare_aggregate(self, aggregate: list, profiler: PipelineProfiler = None):
         if "query" not in aggregate[0]:
             raise ERROR_REQUIRED_QUERY_OPERATION()
 
-        for stage in aggregate:
+        self._check_aggregate_operations(aggregate)
+
+        if config.get_global("STAT_PLAN_OPTIMIZER", False):
+            aggregate = self._optimize_aggregate(aggregate, profiler)
+
+        return aggregate
+
+    @staticmethod
+    def _optimize_aggregate(aggregate: list, profiler: PipelineProfiler = None):
+        plan_optimizer = PlanOptimizer(aggregate)
+        aggregate = plan_optimizer.optimize()
+
+        for rewrite in plan_optimizer.rewrites:
+            _LOGGER.debug(f"[_optimize_aggregate] {rewrite}")
+
+        if profiler is not None:
+            profiler.set_plan(aggregate, plan_optimizer.rewrites)
+
+        return aggregate
+
+    @staticmethod
+    def _split_final_sort(aggregate: list):
+        if len(aggregate) > 1 and "sort" in aggregate[-1]:
+            return aggregate[:-1], aggregate[-1]["sort"]
+
+        return aggregate, None
+
+    def _execute_aggregate_operations(
+        self,
+        aggregate: list,
+        domain_id: str = None,
+        profiler: PipelineProfiler = None,
+        shared_results: dict = None,
+    ):
+        df = None
+
+        # Upstream queries never depend on earlier stages,
+        # so they are fetched up front and merged in order.
+        upstream_dfs = self._fetch_upstream_stages(
+            aggregate, domain_id, profiler, shared_results
+        )
+
+        for index, stage in enumerate(aggregate):
+            started_at = time.perf_counter()
+            input_df = df
+
             if "query" in stage:
-                df = self._query(stage["query"], domain_id=domain_id)
+                df = upstream_dfs[index]
 
             elif "join" in stage:
-                df = self._join(stage["join"], df, domain_id)
+                df = self._join(stage["join"], df, upstream_dfs[index])
 
             elif "concat" in stage:
-                df = self._concat(stage["concat"], df, domain_id)
+                df = self._concat(df, upstream_dfs[index])
 
             elif "sort" in stage:
                 df = self._sort(stage["sort"], df)
@@ -50,16 +224,166 @@ class ResourceManager(BaseManager):
             elif "fill_na" in stage:
                 df = self._fill_na(stage["fill_na"], df)
 
-            else:
+            if profiler is not None:
+                operator = self._get_stage_operator(stage)
+                profiler.add_stage(index, operator, started_at, input_df, df)
+
+        return df
+
+    @staticmethod
+    def _get_stage_operator(stage: dict) -> str:
+        for operator in _SUPPORTED_AGGREGATE_OPERATIONS:
+            if operator in stage:
+                return operator
+
+    @staticmethod
+    def _check_aggregate_operations(aggregate: list) -> None:
+        for stage in aggregate:
+            if not any(op in stage for op in _SUPPORTED_AGGREGATE_OPERATIONS):
                 raise ERROR_REQUIRED_PARAMETER(
                     key="aggregate.query | aggregate.join | aggregate.concat | "
                     "aggregate.sort | aggregate.formula | aggregate.fill_na"
                 )
 
-        df = df.replace({np.nan: None})
-        results = df.to_dict("records")
+            # Formulas are parsed and validated even if the data is empty,
+            # so unsafe expressions are rejected when a schedule is saved.
+            if "formula" in stage:
+                if "eval" in stage["formula"]:
+                    compile_formula(stage["formula"]["eval"], "eval")
+                elif "query" in stage["formula"]:
+                    compile_formula(stage["formula"]["query"], "query")
+
+            if "join" in stage:
+                join_type = stage["join"].get("type")
+                if join_type is not None and join_type not in _JOIN_TYPE_MAP:
+                    raise ERROR_INVALID_PARAMETER_TYPE(
+                        key="aggregate.join.type", type=list(_JOIN_TYPE_MAP.keys())
+                    )
+
+    @staticmethod
+    def _iter_upstream_stages(aggregate: list):
+        for index, stage in enumerate(aggregate):
+            for operator in _UPSTREAM_OPERATIONS:
+                if operator in stage:
+                    yield index, operator, stage[operator]
+                    break
+
+    def _fetch_upstream_stages(
+        self,
+        aggregate: list,
+        domain_id: str = None,
+        profiler: PipelineProfiler = None,
+        shared_results: dict = None,
+    ) -> dict:
+        started_at = time.perf_counter()
+        shared_results = shared_results or {}
+        upstream_requests = {}
+        stage_requests = {}
+        for index, operator, options in self._iter_upstream_stages(aggregate):
+            # Stages with the same upstream request only differ
+            # in extend_data, so the request is sent once.
+            request_key = self._make_upstream_request_key(options)
+            is_requested = request_key in upstream_requests
+            if not is_requested and request_key not in shared_results:
+                connector, resource = self._get_stat_connector(options, operator)
+                upstream_requests[request_key] = (connector, resource, options)
+
+            stage_requests[index] = (request_key, options)
+
+        fetched_results = dict(shared_results)
+        fetched_results.update(
+            self._fetch_upstream_requests(upstream_requests, domain_id)
+        )
+
+        request_counts = Counter(
+            request_key for request_key, _ in stage_requests.values()
+        )
+        upstream_dfs = {}
+        for index, (request_key, options) in stage_requests.items():
+            df, elapsed_ms = fetched_results[request_key]
+            if request_counts[request_key] > 1 or request_key in shared_results:
+                df = df.copy(deep=False)
+
+            upstream_dfs[index] = self._extend_data(df, options.get("extend_data", {}))
+
+            if profiler is not None:
+                profiler.add_upstream(index, elapsed_ms)
+
+        if profiler is not None:
+            profiler.add_fetch((time.perf_counter() - started_at) * 1000)
+
+        return upstream_dfs
+
+    def _fetch_upstream_requests(
+        self, upstream_requests: dict, domain_id: str = None, ignore_errors=False
+    ) -> dict:
+        query_func = self._try_timed_query if ignore_errors else self._timed_query
+
+        # Worker threads do not share the caller's transaction,
+        # so the token is read here and passed on explicitly.
+        token = self.transaction.get_meta("token")
+        max_workers = config.get_global("STAT_QUERY_MAX_WORKERS", 1)
+
+        if max_workers <= 1 or len(upstream_requests) <= 1:
+            results = {
+                request_key: query_func(*request, domain_id, token)
+                for request_key, request in upstream_requests.items()
+            }
+        else:
+            _LOGGER.debug(
+                f"[_fetch_upstream_requests] fetch {len(upstream_requests)} upstream "
+                f"queries (max_workers = {max_workers})"
+            )
+
+            executor = _get_upstream_executor()
+            futures = {
+                request_key: executor.submit(query_func, *request, domain_id, token)
+                for request_key, request in upstream_requests.items()
+            }
+
+            try:
+                results = {
+                    request_key: future.result()
+                    for request_key, future in futures.items()
+                }
+            except Exception:
+                for future in futures.values():
+                    future.cancel()
+                raise
+
+        return {
+            request_key: result
+            for request_key, result in results.items()
+            if result is not None
+        }
+
+    def _timed_query(
+        self,
+        connector: SpaceConnector,
+        resource: str,
+        options: dict,
+        domain_id: str = None,
+        token: str = None,
+    ):
+        started_at = time.perf_counter()
+        df = self._query(connector, resource, options, domain_id, token)
+        return df, (time.perf_counter() - started_at) * 1000
+
+    def _try_timed_query(self, *args):
+        try:
+            return self._timed_query(*args)
+        except Exception as e:
+            _LOGGER.warning(f"[_try_timed_query] upstream query failed: {e}")
+            return None
 
-        return results
+    @staticmethod
+    def _make_upstream_request_key(options: dict) -> str:
+        return utils.dict_to_hash(
+            {
+                "resource_type": options.get("resource_type"),
+                "query": options.get("query"),
+            }
+        )
 
     @staticmethod
     def _fill_na(options, base_df):
@@ -84,8 +408,10 @@ class ResourceManager(BaseManager):
 
     @staticmethod
     def _execute_formula_query(formula, base_df):
+        compiled_formula = compile_formula(formula, "query")
+
         try:
-            base_df = base_df.query(formula)
+            base_df = compiled_formula.query(base_df)
         except Exception as e:
             raise ERROR_STATISTICS_FORMULA(formula=formula)
 
@@ -93,26 +419,34 @@ class ResourceManager(BaseManager):
 
     @staticmethod
     def _execute_formula_eval(formula, base_df):
+        compiled_formula = compile_formula(formula, "eval")
+
         try:
-            base_df = base_df.eval(formula)
+            base_df = compiled_formula.eval(base_df)
         except Exception as e:
             raise ERROR_STATISTICS_FORMULA(formula=formula)
 
         return base_df
 
     @staticmethod
-    def _sort(options, base_df):
-        if len(base_df) > 0:
-            keys = []
-            ascendings = []
+    def _get_sort_keys(options):
+        keys = []
+        ascendings = []
+
+        for sort_option in options:
+            key = sort_option.get("key")
+            ascending = not sort_option.get("desc", False)
 
-            for sort_option in options:
-                key = sort_option.get("key")
-                ascending = not sort_option.get("desc", False)
+            if key:
+                keys.append(key)
+                ascendings.append(ascending)
 
-                if key:
-                    keys.append(key)
-                    ascendings.append(ascending)
+        return keys, ascendings
+
+    @classmethod
+    def _sort(cls, options, base_df):
+        if len(base_df) > 0:
+            keys, ascendings = cls._get_sort_keys(options)
 
             try:
                 return base_df.sort_values(by=keys, ascending=ascendings)
@@ -123,9 +457,39 @@ class ResourceManager(BaseManager):
 
         return base_df
 
-    def _concat(self, options, base_df, domain_id=None):
-        concat_df = self._query(options, operator="join", domain_id=domain_id)
+    @classmethod
+    def _sort_top_k(cls, options, base_df, k):
+        keys, ascendings = cls._get_sort_keys(options)
+
+        if len(keys) == 0 or k >= len(base_df) or keys[0] not in base_df.columns:
+            return cls._sort(options, base_df)
+
+        first_column = base_df[keys[0]]
+        if not pd.api.types.is_numeric_dtype(first_column):
+            return cls._sort(options, base_df)
+
+        values = first_column.to_numpy(dtype="float64", na_value=np.nan)
+        valid = ~np.isnan(values)
+        valid_count = int(valid.sum())
+
+        # Null values are sorted last, so they only reach the page
+        # when there are not enough non-null values.
+        if valid_count <= k:
+            return cls._sort(options, base_df)
+
+        # Select every row that can be in the top k by the first key,
+        # including ties, and sort only those candidates.
+        if ascendings[0]:
+            threshold = np.partition(values[valid], k - 1)[k - 1]
+            candidates = valid & (values <= threshold)
+        else:
+            threshold = np.partition(values[valid], valid_count - k)[valid_count - k]
+            candidates = valid & (values >= threshold)
+
+        return cls._sort(options, base_df[candidates])
 
+    @staticmethod
+    def _concat(base_df, concat_df):
         try:
             base_df = pd.concat([base_df, concat_df], ignore_index=True)
         except Exception as e:
@@ -137,8 +501,7 @@ class ResourceManager(BaseManager):
     def _generate_empty_data(query):
         empty_data = {}
         aggregate = query.get("aggregate", [])
-        aggregate.reverse()
-        for stage in aggregate:
+        for stage in reversed(aggregate):
             if "group" in stage:
                 group = stage["group"]
                 for key in group.get("keys", []):
@@ -153,15 +516,10 @@ class ResourceManager(BaseManager):
 
         return pd.DataFrame(empty_data)
 
-    def _join(self, options, base_df, domain_id=None):
-        if "type" in options and options["type"] not in _JOIN_TYPE_MAP:
-            raise ERROR_INVALID_PARAMETER_TYPE(
-                key="aggregate.join.type", type=list(_JOIN_TYPE_MAP.keys())
-            )
-
+    @staticmethod
+    def _join(options, base_df, join_df):
         join_keys = options.get("keys")
         join_type = options.get("type", "LEFT")
-        join_df = self._query(options, operator="join", domain_id=domain_id)
 
         try:
             if join_keys:
@@ -186,36 +544,71 @@ class ResourceManager(BaseManager):
 
         return base_df
 
-    def _query(self, options, operator="query", domain_id=None):
+    def _get_stat_connector(self, options, operator="query"):
         resource_type = options.get("resource_type")
-        query = options.get("query")
-        extend_data = options.get("extend_data", {})
 
         if resource_type is None:
             raise ERROR_REQUIRED_PARAMETER(key=f"aggregate.{operator}.resource_type")
 
-        if query is None:
+        if options.get("query") is None:
             raise ERROR_REQUIRED_PARAMETER(key=f"aggregate.{operator}.query")
 
         service, resource = self._parse_resource_type(resource_type)
 
+        # Connectors are bound to the current transaction,
+        # so they must be created in the caller's thread.
         try:
-            token = self.transaction.get_meta("token")
-            token_type = JWTUtil.get_value_from_token(token, "typ")
-
             connector: SpaceConnector = self.locator.get_connector(
                 "SpaceConnector", service=service
             )
+        except ERROR_BASE as e:
+            raise ERROR_STATISTICS_QUERY(reason=e.message)
+        except Exception as e:
+            raise ERROR_STATISTICS_QUERY(reason=e)
 
-            _LOGGER.debug(f"[_query] stat resource: {resource_type}.stat")
-            if token_type == "SYSTEM_TOKEN":
-                response = connector.dispatch(
-                    f"{resource}.stat", {"query": query}, x_domain_id=domain_id
-                )
-            else:
-                response = connector.dispatch(f"{resource}.stat", {"query": query})
+        return connector, resource
+
+    def _query(
+        self,
+        connector: SpaceConnector,
+        resource: str,
+        options: dict,
+        domain_id=None,
+        token: str = None,
+    ):
+        resource_type = options["resource_type"]
+        query = options["query"]
+
+        try:
+            token = token or self.transaction.get_meta("token")
+            token_type = JWTUtil.get_value_from_token(token, "typ")
+
+            cache_key = self._make_query_cache_key(
+                resource_type, query, token, token_type, domain_id
+            )
+            results = self._get_cached_results(cache_key)
+            cache_hit = results is not None
 
-            results = response.get("results", [])
+            _LOGGER.debug(
+                f"[_query] stat resource: {resource_type}.stat "
+                f"(cache_hit = {cache_hit})"
+            )
+
+            if not cache_hit:
+                if token_type == "SYSTEM_TOKEN":
+                    response = connector.dispatch(
+                        f"{resource}.stat",
+                        {"query": query},
+                        token=token,
+                        x_domain_id=domain_id,
+                    )
+                else:
+                    response = connector.dispatch(
+                        f"{resource}.stat", {"query": query}, token=token
+                    )
+
+                results = response.get("results", [])
+                self._set_cached_results(cache_key, resource_type, results)
 
             if len(results) > 0 and not isinstance(results[0], dict):
                 df = pd.DataFrame(results, columns=["value"])
@@ -223,15 +616,92 @@ class ResourceManager(BaseManager):
                 df = pd.DataFrame(results)
 
                 if len(df) == 0:
-                    df = self._generate_empty_data(options["query"])
+                    df = self._generate_empty_data(query)
 
-            return self._extend_data(df, extend_data)
+            return df
 
         except ERROR_BASE as e:
             raise ERROR_STATISTICS_QUERY(reason=e.message)
         except Exception as e:
             raise ERROR_STATISTICS_QUERY(reason=e)
 
+    def _make_pipeline_fingerprint(self, aggregate: list, domain_id: str = None):
+        token = self.transaction.get_meta("token")
+        token_type = JWTUtil.get_value_from_token(token, "typ")
+        domain_id, scope = self._get_request_scope(token, token_type, domain_id)
+
+        aggregate_hash = utils.dict_to_hash({"aggregate": aggregate})
+        return f"{domain_id}:{scope}:{aggregate_hash}"
+
+    @staticmethod
+    def _get_request_scope(token: str, token_type: str, domain_id: str = None):
+        # Results of a user token depend on its permissions,
+        # so they are scoped to the token itself.
+        if token_type == "SYSTEM_TOKEN":
+            return domain_id, "system"
+        else:
+            domain_id = JWTUtil.get_value_from_token(token, "did")
+            return domain_id, hashlib.sha1(token.encode()).hexdigest()
+
+    @staticmethod
+    def _make_query_cache_key(
+        resource_type: str, query: dict, token: str, token_type: str, domain_id=None
+    ):
+        cache_conf = config.get_global("STAT_QUERY_CACHE", {})
+        if not cache_conf.get("enabled", False):
+            return None
+
+        if not cache.is_set(cache_conf.get("alias", "default")):
+            return None
+
+        domain_id, scope = ResourceManager._get_request_scope(
+            token, token_type, domain_id
+        )
+        query_hash = utils.dict_to_hash(query)
+        return f"statistics:stat-query:{domain_id}:{scope}:{resource_type}:{query_hash}"
+
+    @staticmethod
+    def _get_cached_results(cache_key):
+        if cache_key is None:
+            return None
+
+        cache_conf = config.get_global("STAT_QUERY_CACHE", {})
+        alias = cache_conf.get("alias", "default")
+
+        # The cache only saves upstream calls, so its errors never fail a stat.
+        try:
+            with _get_cache_lock(alias):
+                return cache.get(cache_key, alias=alias)
+        except Exception as e:
+            _LOGGER.warning(f"[_get_cached_results] failed to get cache: {e}")
+            return None
+
+    @staticmethod
+    def _set_cached_results(cache_key, resource_type: str, results: list) -> None:
+        if cache_key is None:
+            return None
+
+        cache_conf = config.get_global("STAT_QUERY_CACHE", {})
+        if len(results) > cache_conf.get("max_results", 0):
+            return None
+
+        resource_ttl = cache_conf.get("resource_ttl", {})
+        ttl = resource_ttl.get(resource_type, cache_conf.get("ttl", 60))
+        if ttl <= 0:
+            return None
+
+        alias = cache_conf.get("alias", "default")
+
+        # LocalCache has no per-key expiry, its keys expire by the ttl of the
+        # alias in CACHES.
+        expire = None if _is_local_cache(alias) else ttl
+
+        try:
+            with _get_cache_lock(alias):
+                cache.set(cache_key, results, expire=expire, alias=alias)
+        except Exception as e:
+            _LOGGER.warning(f"[_set_cached_results] failed to set cache: {e}")
+
     @staticmethod
     def _parse_resource_type(resource_type):
         try:
@@ -251,17 +721,66 @@ class ResourceManager(BaseManager):
 
         return df
 
-    @staticmethod
-    def _page(page, results):
-        response = {"total_count": len(results)}
-
+    @classmethod
+    def _page(cls, page, df, sort_options=None):
         if "limit" in page and page["limit"] > 0:
             start = page.get("start", 1)
             if start < 1:
                 start = 1
 
-            response["results"] = results[start - 1 : start + page["limit"] - 1]
+            end = start + page["limit"] - 1
+            if sort_options is not None:
+                df = cls._sort_top_k(sort_options, df, end)
+
+            df = df.iloc[start - 1 : end]
+        elif sort_options is not None:
+            df = cls._sort(sort_options, df)
+
+        return df
+
+    @classmethod
+    def _serialize(cls, df, output_format="RECORDS"):
+        if output_format == "COLUMNAR":
+            return cls._to_columns(df)
         else:
-            response["results"] = results
+            return {"results": cls._to_records(df)}
 
-        return response
+    @classmethod
+    def _to_records(cls, df):
+        columns = list(df.columns)
+        if len(columns) == 0:
+            return [{} for _ in range(len(df))]
+
+        values = [
+            cls._get_column_values(df.iloc[:, index]) for index in range(len(columns))
+        ]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    @classmethod
+    def _to_columns(cls, df):
+        columns = []
+        values = []
+
+        for index, column in enumerate(df.columns):
+            columns.append(column)
+            values.append(cls._get_column_values(df.iloc[:, index]))
+
+        return {"columns": columns, "values": values}
+
+    @staticmethod
+    def _get_column_values(series):
+        # tolist() converts numpy scalars to native numbers
+        # without upcasting the column to object.
+        values = series.tolist()
+
+        # Numpy integer and boolean columns can not hold nulls, while nullable
+        # extension dtypes (Int64, boolean, string) yield pd.NA.
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iub":
+            return values
+
+        null_mask = series.isna().to_numpy(dtype=bool)
+        if null_mask.any():
+            for index in np.flatnonzero(null_mask):
+                values[index] = None
+
+        return values
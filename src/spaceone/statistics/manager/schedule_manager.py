@@ -1,8 +1,11 @@
 import logging
+from datetime import datetime, timedelta
 from typing import Tuple
 from mongoengine import QuerySet
 
+from spaceone.core import config
 from spaceone.core.manager import BaseManager
+from spaceone.statistics.lib.next_run import get_next_run_at, get_spread_offset
 from spaceone.statistics.model.schedule_model import Schedule
 from spaceone.statistics.manager.identity_manager import IdentityManager
 
@@ -26,7 +29,11 @@ class ScheduleManager(BaseManager):
         schedule_vo: Schedule = self.schedule_model.create(params)
         self.transaction.add_rollback(_rollback, schedule_vo)
 
-        return schedule_vo
+        # The spread offset depends on the generated schedule_id.
+        next_run_at = self.get_next_run_at(
+            schedule_vo.schedule_id, params.get("schedule"), datetime.utcnow()
+        )
+        return schedule_vo.update({"next_run_at": next_run_at})
 
     def update_schedule_by_vo(self, params: dict, schedule_vo: Schedule) -> Schedule:
         def _rollback(old_data: dict) -> None:
@@ -53,6 +60,168 @@ class ScheduleManager(BaseManager):
     def stat_schedules(self, query: dict) -> dict:
         return self.schedule_model.stat(**query)
 
+    @staticmethod
+    def get_next_run_at(schedule_id: str, scheduled: dict, after: datetime):
+        window = config.get_global("STAT_SCHEDULER_SPREAD_WINDOW", 0)
+        offset = get_spread_offset(schedule_id, scheduled, window)
+        return get_next_run_at(scheduled, after, offset)
+
+    def list_due_schedules(
+        self,
+        now: datetime,
+        domain_ids: list = None,
+        job_limit: int = None,
+        domain_limit: int = None,
+        job_size: int = 0,
+    ) -> list:
+        """Claims the due schedules and returns them in dispatch order.
+
+        The scheduler packs the schedules of a domain into jobs of job_size
+        (all of them in one job if 0), so job_limit bounds the number of
+        jobs that schedules of the current hour may open.
+        """
+
+        self._init_next_run_at(now)
+
+        query = {"state": "ENABLED", "next_run_at__lte": now}
+
+        # Only schedules of the given domains are claimed, so the runs of
+        # other domains are not moved forward without being dispatched.
+        if domain_ids is not None:
+            query["domain_id"] = domain_ids
+
+        schedules = (
+            self.schedule_model.filter(**query)
+            .only(
+                "schedule_id", "domain_id", "schedule", "next_run_at", "running_since"
+            )
+            .order_by("next_run_at")
+            .as_pymongo()
+        )
+
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        domain_counts = {}
+        job_count = 0
+        due_schedules = []
+        for schedule in schedules:
+            domain_id = schedule["domain_id"]
+            domain_count = domain_counts.get(domain_id, 0)
+
+            # A schedule opens a new job unless the last job of its domain
+            # still has room.
+            opens_job = domain_count == 0 or (
+                job_size > 0 and domain_count % job_size == 0
+            )
+
+            # Pacing only defers schedules of the current hour, the ones left
+            # over from an earlier hour are always dispatched.
+            if schedule["next_run_at"] >= current_hour:
+                if job_limit is not None and opens_job and job_count >= job_limit:
+                    continue
+
+                if domain_limit and domain_count >= domain_limit:
+                    continue
+
+            next_run_at = self.get_next_run_at(
+                schedule["schedule_id"], schedule.get("schedule"), now
+            )
+
+            # A run is skipped while the previous one is still going,
+            # next_run_at still moves on to the following run.
+            is_running = self._is_running(schedule, now)
+            updates = {"next_run_at": next_run_at}
+            if not is_running:
+                updates["last_scheduled_at"] = now
+
+            # The conditional update claims the run, so a schedule is dispatched
+            # only once even if several schedulers are running. It goes through
+            # pymongo, since the model's queryset does not return the result.
+            result = self.schedule_model._get_collection().update_one(
+                {"_id": schedule["_id"], "next_run_at": schedule["next_run_at"]},
+                {"$set": updates},
+            )
+
+            if result.modified_count != 1:
+                continue
+
+            if is_running:
+                _LOGGER.info(
+                    f"[list_due_schedules] skip schedule already running: "
+                    f"{schedule['schedule_id']} "
+                    f"(running_since = {schedule['running_since']})"
+                )
+                continue
+
+            if opens_job:
+                job_count += 1
+
+            domain_counts[domain_id] = domain_count + 1
+            due_schedules.append(
+                {"schedule_id": schedule["schedule_id"], "domain_id": domain_id}
+            )
+
+        return due_schedules
+
+    def start_run(self, schedule_vo: Schedule) -> bool:
+        now = datetime.utcnow()
+        stale_since = now - timedelta(
+            seconds=config.get_global("STAT_SCHEDULE_RUN_TIMEOUT", 3600)
+        )
+
+        # A run older than the timeout is treated as lost, e.g. a killed worker.
+        # The update goes through pymongo, since the update methods of the
+        # model's queryset do not return the number of updated documents.
+        result = self.schedule_model._get_collection().update_one(
+            {
+                "_id": schedule_vo.id,
+                "$or": [
+                    {"running_since": None},
+                    {"running_since": {"$lt": stale_since}},
+                ],
+            },
+            {"$set": {"running_since": now}},
+        )
+
+        return result.modified_count == 1
+
+    def finish_run(
+        self, schedule_vo: Schedule, status: str, duration: float, row_count: int
+    ) -> None:
+        self.schedule_model.objects(id=schedule_vo.id).update_one(
+            set__running_since=None,
+            set__last_status=status,
+            set__last_duration=duration,
+            set__last_row_count=row_count,
+        )
+
+    @staticmethod
+    def _is_running(schedule: dict, now: datetime) -> bool:
+        running_since = schedule.get("running_since")
+        if running_since is None:
+            return False
+
+        timeout = config.get_global("STAT_SCHEDULE_RUN_TIMEOUT", 3600)
+        return running_since > now - timedelta(seconds=timeout)
+
+    def _init_next_run_at(self, now: datetime) -> None:
+        # Schedules created before next_run_at existed are due from the start
+        # of the current hour, so the hourly run of this hour is not skipped,
+        # unless they were already dispatched after that.
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        for schedule_vo in self.schedule_model.filter(
+            state="ENABLED", next_run_at=None
+        ).only("schedule_id", "schedule", "last_scheduled_at"):
+            after = hour_start - timedelta(minutes=1)
+            last_scheduled_at = schedule_vo.last_scheduled_at
+            if last_scheduled_at and last_scheduled_at > after:
+                after = last_scheduled_at
+
+            next_run_at = self.get_next_run_at(
+                schedule_vo.schedule_id, schedule_vo.schedule.to_dict(), after
+            )
+            if next_run_at:
+                schedule_vo.update({"next_run_at": next_run_at})
+
     def list_domains(self, query: dict) -> dict:
         identity_mgr: IdentityManager = self.locator.get_manager("IdentityManager")
         return identity_mgr.list_domains(query)
@@ -1,2 +1,5 @@
 from spaceone.statistics.model.schedule_model import Schedule
 from spaceone.statistics.model.history_model import History
+from spaceone.statistics.model.history_run_model import HistoryRun
+from spaceone.statistics.model.history_bucket_model import HistoryBucket, HistoryView
+from spaceone.statistics.model.history_rollup_model import HistoryRollup
@@ -0,0 +1,146 @@
+from mongoengine import *
+
+from spaceone.core.model.mongo_model import MongoModel
+from spaceone.statistics.model.schedule_model import Schedule
+
+
+class HistoryBucket(MongoModel):
+    topic = StringField(max_length=255)
+    schedule = ReferenceField("Schedule", reverse_delete_rule=NULLIFY)
+    columns = ListField(StringField())
+    rows = ListField(ListField())
+    row_count = IntField(default=0)
+    domain_id = StringField(max_length=255)
+    run_id = StringField(max_length=40, default=None, null=True)
+    created_at = DateTimeField(required=True)
+
+    meta = {
+        "updatable_fields": [],
+        "ordering": ["-created_at"],
+        "indexes": [
+            {
+                "fields": ["domain_id", "topic", "created_at", "_id"],
+                "name": "COMPOUND_INDEX_FOR_TIME_RANGE",
+            },
+            {
+                "fields": ["domain_id", "-created_at", "-_id"],
+                "name": "COMPOUND_INDEX_FOR_SCAN",
+            },
+            "topic",
+            "schedule",
+            "created_at",
+            "domain_id",
+            "run_id",
+        ],
+    }
+
+
+class HistoryView(MongoModel):
+    """History read from both storage layouts, one document per row
+
+    There is no collection behind this model, get_union_pipeline is run on
+    the history collection and appends the unwound bucket rows to its
+    documents. Rows of a bucket share its _id and are told apart by
+    row_index.
+    """
+
+    topic = StringField(max_length=255)
+    schedule = ReferenceField("Schedule", reverse_delete_rule=DO_NOTHING)
+    values = DictField()
+    domain_id = StringField(max_length=255)
+    run_id = StringField(max_length=40, default=None, null=True)
+    row_index = IntField(default=None, null=True)
+    created_at = DateTimeField()
+
+    meta = {
+        "collection": "history_view",
+        "auto_create_index": False,
+        "updatable_fields": [],
+        "change_query_keys": {
+            "user_projects": "values.project_id",
+            "project_id": "values.project_id",
+            "workspace_id": "values.workspace_id",
+        },
+        "ordering": ["-created_at"],
+        "indexes": [],
+    }
+
+    # Fields that a bucket has in common with its rows
+    _BUCKET_FIELDS = {"_id", "topic", "schedule", "domain_id", "run_id", "created_at"}
+
+    @classmethod
+    def get_union_pipeline(cls, bucket_collection: str, match: dict = None) -> list:
+        """Returns the history documents and bucket rows that match the query.
+
+        The match is applied to both branches before anything else, so that
+        they use the indexes of their collection. Conditions on the bucket
+        fields, such as domain_id and the created_at range, are applied to
+        the buckets before they are unwound, the others to the rows.
+        """
+
+        match = match or {}
+        pipeline = []
+        bucket_pipeline = []
+
+        if match:
+            pipeline.append({"$match": match})
+
+            bucket_match = cls._get_bucket_match(match)
+            if bucket_match:
+                bucket_pipeline.append({"$match": bucket_match})
+
+        bucket_pipeline += [
+            {"$unwind": {"path": "$rows", "includeArrayIndex": "row_index"}},
+            {
+                "$project": {
+                    "topic": 1,
+                    "schedule": 1,
+                    "domain_id": 1,
+                    "run_id": 1,
+                    "row_index": 1,
+                    "created_at": 1,
+                    "values": {
+                        "$arrayToObject": {"$zip": {"inputs": ["$columns", "$rows"]}}
+                    },
+                }
+            },
+        ]
+
+        if match:
+            bucket_pipeline.append({"$match": match})
+
+        pipeline.append(
+            {"$unionWith": {"coll": bucket_collection, "pipeline": bucket_pipeline}}
+        )
+        return pipeline
+
+    @classmethod
+    def _get_bucket_match(cls, match: dict) -> dict:
+        if list(match) == ["$and"]:
+            conditions = match["$and"]
+        else:
+            conditions = [{key: value} for key, value in match.items()]
+
+        bucket_conditions = [
+            condition
+            for condition in conditions
+            if condition and cls._is_bucket_condition(condition)
+        ]
+
+        if len(bucket_conditions) == 0:
+            return {}
+        elif len(bucket_conditions) == 1:
+            return bucket_conditions[0]
+        else:
+            return {"$and": bucket_conditions}
+
+    @classmethod
+    def _is_bucket_condition(cls, condition: dict) -> bool:
+        for key, value in condition.items():
+            if key in ["$and", "$or"]:
+                if not all(cls._is_bucket_condition(item) for item in value):
+                    return False
+            elif key not in cls._BUCKET_FIELDS:
+                return False
+
+        return True
@@ -9,6 +9,7 @@ class History(MongoModel):
     schedule = ReferenceField("Schedule", reverse_delete_rule=NULLIFY)
     values = DictField()
     domain_id = StringField(max_length=255)
+    run_id = StringField(max_length=40, default=None, null=True)
     created_at = DateTimeField(required=True)
 
     meta = {
@@ -20,11 +21,20 @@ class History(MongoModel):
         },
         "ordering": ["-created_at"],
         "indexes": [
+            {
+                "fields": ["domain_id", "topic", "created_at", "_id"],
+                "name": "COMPOUND_INDEX_FOR_TIME_RANGE",
+            },
+            {
+                "fields": ["domain_id", "-created_at", "-_id"],
+                "name": "COMPOUND_INDEX_FOR_SCAN",
+            },
             "topic",
             "schedule",
             "created_at",
             "values.project_id",
             "values.workspace_id",
             "domain_id",
+            "run_id",
         ],
     }
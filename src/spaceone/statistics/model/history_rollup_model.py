@@ -0,0 +1,35 @@
+from mongoengine import *
+
+from spaceone.core.model.mongo_model import MongoModel
+from spaceone.statistics.model.schedule_model import Schedule
+
+
+class HistoryRollup(MongoModel):
+    topic = StringField(max_length=255)
+    schedule = ReferenceField("Schedule", reverse_delete_rule=NULLIFY)
+    period = StringField(max_length=20, choices=("DAILY", "WEEKLY"))
+    period_start = DateTimeField(required=True)
+    key = DictField()
+    values = DictField()
+    sample_count = IntField(default=0)
+    domain_id = StringField(max_length=255)
+    created_at = DateTimeField(auto_now_add=True)
+
+    meta = {
+        "updatable_fields": [],
+        "change_query_keys": {
+            "user_projects": "key.project_id",
+            "project_id": "key.project_id",
+            "workspace_id": "key.workspace_id",
+        },
+        "ordering": ["-period_start"],
+        "indexes": [
+            {
+                "fields": ["domain_id", "topic", "period", "period_start"],
+                "name": "COMPOUND_INDEX_FOR_PERIOD",
+            },
+            "schedule",
+            "key.project_id",
+            "key.workspace_id",
+        ],
+    }
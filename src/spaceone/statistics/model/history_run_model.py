@@ -0,0 +1,35 @@
+from mongoengine import *
+
+from spaceone.core.model.mongo_model import MongoModel
+from spaceone.statistics.model.schedule_model import Schedule
+
+
+class HistoryRun(MongoModel):
+    run_id = StringField(max_length=40, generate_id="run", unique=True)
+    topic = StringField(max_length=255)
+    schedule = ReferenceField("Schedule", reverse_delete_rule=NULLIFY)
+    status = StringField(
+        max_length=20,
+        default="IN_PROGRESS",
+        choices=("IN_PROGRESS", "SUCCESS", "FAILURE"),
+    )
+    row_count = IntField(default=0)
+    duration = FloatField(default=None, null=True)
+    domain_id = StringField(max_length=255)
+    created_at = DateTimeField(auto_now_add=True)
+    finished_at = DateTimeField(default=None, null=True)
+
+    meta = {
+        "updatable_fields": ["status", "row_count", "duration", "finished_at"],
+        "minimal_fields": ["run_id", "topic", "status", "row_count"],
+        "ordering": ["-created_at"],
+        "indexes": [
+            {
+                "fields": ["domain_id", "topic", "-created_at"],
+                "name": "COMPOUND_INDEX_FOR_LATEST_RUN",
+            },
+            "schedule",
+            "status",
+            "created_at",
+        ],
+    }
@@ -13,23 +13,47 @@ class Scheduled(EmbeddedDocument):
         return dict(self.to_mongo())
 
 
+class Retention(EmbeddedDocument):
+    raw_days = IntField(min_value=1, required=True)
+    rollup = StringField(max_length=20, default='DAILY', choices=('DAILY', 'WEEKLY'))
+    rollup_days = IntField(min_value=1, default=None, null=True)
+    metrics = ListField(StringField(max_length=255), default=None, null=True)
+
+    def to_dict(self):
+        return dict(self.to_mongo())
+
+
 class Schedule(MongoModel):
     schedule_id = StringField(max_length=40, generate_id='sch', unique=True)
     topic = StringField(max_length=255, unique_with='domain_id')
     state = StringField(max_length=20, default='ENABLED', choices=('ENABLED', 'DISABLED'))
     options = DictField(required=True)
     schedule = EmbeddedDocumentField(Scheduled, default=Scheduled)
+    retention = EmbeddedDocumentField(Retention, default=None, null=True)
     tags = DictField()
     domain_id = StringField(max_length=255)
     created_at = DateTimeField(auto_now_add=True)
     last_scheduled_at = DateTimeField(default=None, null=True)
+    next_run_at = DateTimeField(default=None, null=True)
+    running_since = DateTimeField(default=None, null=True)
+    last_duration = FloatField(default=None, null=True)
+    last_status = StringField(
+        max_length=20, default=None, null=True, choices=('SUCCESS', 'FAILURE')
+    )
+    last_row_count = IntField(default=None, null=True)
 
     meta = {
         'updatable_fields': [
             'schedule',
+            'retention',
             'state',
             'tags',
-            'last_scheduled_at'
+            'last_scheduled_at',
+            'next_run_at',
+            'running_since',
+            'last_duration',
+            'last_status',
+            'last_row_count'
         ],
         'minimal_fields': [
             'schedule_id',
@@ -40,6 +64,10 @@ class Schedule(MongoModel):
             'topic'
         ],
         'indexes': [
+            {
+                'fields': ['state', 'next_run_at'],
+                'name': 'COMPOUND_INDEX_FOR_NEXT_RUN'
+            },
             'topic',
             'state',
             'domain_id',
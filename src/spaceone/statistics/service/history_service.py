@@ -1,9 +1,19 @@
 import logging
+import time
+from datetime import datetime, timedelta
 
+from spaceone.core import config
 from spaceone.core.service import *
+from spaceone.statistics.error import *
+from spaceone.statistics.lib.rollup import (
+    get_metric_columns,
+    get_period_range,
+    rollup_rows,
+)
 from spaceone.statistics.manager.resource_manager import ResourceManager
 from spaceone.statistics.manager.schedule_manager import ScheduleManager
 from spaceone.statistics.manager.history_manager import HistoryManager
+from spaceone.statistics.manager.history_rollup_manager import HistoryRollupManager
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,6 +29,9 @@ class HistoryService(BaseService):
         super().__init__(*args, **kwargs)
         self.resource_mgr: ResourceManager = self.locator.get_manager("ResourceManager")
         self.history_mgr: HistoryManager = self.locator.get_manager("HistoryManager")
+        self.history_rollup_mgr: HistoryRollupManager = self.locator.get_manager(
+            "HistoryRollupManager"
+        )
 
     @transaction(permission="statistics:History.write", role_types=["DOMAIN_ADMIN"])
     @check_required(["schedule_id", "domain_id"])
@@ -39,24 +52,64 @@ class HistoryService(BaseService):
 
         domain_id = params["domain_id"]
         schedule_id = params["schedule_id"]
+        page = params.get("page", {})
 
         schedule_vo = schedule_mgr.get_schedule(schedule_id, domain_id)
-        topic = schedule_vo.topic
-        options = schedule_vo.options
-        aggregate = options.get("aggregate", [])
+        self._create_history(schedule_vo, page, domain_id)
+
+    @transaction(permission="statistics:History.write", role_types=["DOMAIN_ADMIN"])
+    @check_required(["schedule_ids", "domain_id"])
+    def create_batch(self, params: dict) -> None:
+        """Statistics query to resource for several schedules of a domain
+
+        Upstream queries shared by the schedules are fetched only once.
+
+        Args:
+            params (dict): {
+                'schedule_ids': 'list',  # required
+                'domain_id': 'str'       # injected from auth (required)
+            }
+
+        Returns:
+            None
+        """
+
+        schedule_mgr: ScheduleManager = self.locator.get_manager("ScheduleManager")
+
+        domain_id = params["domain_id"]
+        schedule_ids = params["schedule_ids"]
         page = params.get("page", {})
 
-        response = self.resource_mgr.stat(aggregate, page, domain_id)
+        schedule_vos = []
+        for schedule_id in schedule_ids:
+            try:
+                schedule_vos.append(schedule_mgr.get_schedule(schedule_id, domain_id))
+            except Exception as e:
+                _LOGGER.error(f"[create_batch] failed to get schedule: {e}")
+
+        aggregates = [
+            schedule_vo.options.get("aggregate", []) for schedule_vo in schedule_vos
+        ]
+        shared_results = self.resource_mgr.prefetch(aggregates, domain_id)
 
-        results = response.get("results", [])
-        self.history_mgr.create_history(schedule_vo, topic, results, domain_id)
+        for schedule_vo in schedule_vos:
+            try:
+                self._create_history(schedule_vo, page, domain_id, shared_results)
+            except Exception as e:
+                _LOGGER.error(
+                    f"[create_batch] failed to create history: "
+                    f"{schedule_vo.schedule_id} ({e})",
+                    exc_info=True,
+                )
 
     @transaction(
         permission="statistics:History.read",
         role_types=["DOMAIN_ADMIN", "WORKSPACE_OWNER", "WORKSPACE_MEMBER"],
     )
     @check_required(["domain_id"])
-    @append_query_filter(["topic", "workspace_id", "domain_id", "user_projects"])
+    @append_query_filter(
+        ["topic", "run_id", "workspace_id", "domain_id", "user_projects"]
+    )
     @append_keyword_filter(["topic"])
     def list(self, params: dict):
         """List history
@@ -65,6 +118,7 @@ class HistoryService(BaseService):
             params (dict): {
                 'query': 'dict (spaceone.api.core.v1.Query)',
                 'topic': 'str',
+                'run_id': 'str',
                 'workspace_id': 'str',                  # injected from auth
                 'domain_id': 'str',                     # injected from auth (required)
                 'user_projects': 'list'                 # injected from auth
@@ -106,3 +160,158 @@ class HistoryService(BaseService):
 
         query = params.get("query", {})
         return self.history_mgr.stat_history(query)
+
+    @transaction(permission="statistics:History.write", role_types=["DOMAIN_ADMIN"])
+    @check_required(["domain_id"])
+    def apply_retention(self, params: dict) -> None:
+        """Roll up and remove history older than the retention of each schedule
+
+        Called by HistoryRetentionScheduler through the worker, it has no RPC.
+
+        Args:
+            params (dict): {
+                'domain_id': 'str'     # injected from auth (required)
+            }
+
+        Returns:
+            None
+        """
+
+        schedule_mgr: ScheduleManager = self.locator.get_manager("ScheduleManager")
+        domain_id = params["domain_id"]
+
+        schedule_vos, total_count = schedule_mgr.list_schedules(
+            {
+                "filter": [
+                    {"k": "retention.raw_days", "v": True, "o": "exists"},
+                    {"k": "domain_id", "v": domain_id, "o": "eq"},
+                ]
+            }
+        )
+
+        _LOGGER.debug(f"[apply_retention] {domain_id}: {total_count} schedules")
+
+        for schedule_vo in schedule_vos:
+            try:
+                self._apply_retention(schedule_vo, domain_id)
+            except Exception as e:
+                _LOGGER.error(
+                    f"[apply_retention] failed to apply retention: "
+                    f"{schedule_vo.schedule_id} ({e})",
+                    exc_info=True,
+                )
+
+    def _apply_retention(self, schedule_vo, domain_id: str) -> None:
+        topic = schedule_vo.topic
+        retention = schedule_vo.retention
+        period = retention.rollup
+        max_periods = config.get_global("HISTORY_RETENTION_MAX_PERIODS", 7)
+
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=retention.raw_days)
+        metric_columns = retention.metrics or get_metric_columns(
+            schedule_vo.options.get("aggregate", [])
+        )
+
+        # Only whole periods before the cutoff are rolled up, at most
+        # max_periods per run, so large backlogs are processed incrementally.
+        for _ in range(max_periods):
+            oldest = self.history_mgr.get_oldest_history_created_at(
+                topic, domain_id, cutoff
+            )
+            if oldest is None:
+                break
+
+            start, end = get_period_range(oldest, period)
+            if end > cutoff:
+                break
+
+            rollups = rollup_rows(
+                self.history_mgr.iter_history_values(topic, domain_id, start, end),
+                metric_columns,
+            )
+            self.history_rollup_mgr.replace_rollups(
+                schedule_vo, period, start, rollups, domain_id
+            )
+            self.history_mgr.delete_history_between(topic, domain_id, start, end)
+
+            _LOGGER.debug(
+                f"[_apply_retention] rolled up history: {topic} "
+                f"({period} {start.isoformat()}, rollups = {len(rollups)})"
+            )
+
+        if retention.rollup_days:
+            self.history_rollup_mgr.delete_rollups_before(
+                topic, now - timedelta(days=retention.rollup_days), domain_id
+            )
+
+    def _create_history(
+        self, schedule_vo, page: dict, domain_id: str, shared_results: dict = None
+    ) -> None:
+        schedule_mgr: ScheduleManager = self.locator.get_manager("ScheduleManager")
+
+        topic = schedule_vo.topic
+        options = schedule_vo.options
+        aggregate = options.get("aggregate", [])
+
+        # A run queued while the previous one is still going is coalesced
+        # into the running one.
+        if not schedule_mgr.start_run(schedule_vo):
+            _LOGGER.info(
+                f"[_create_history] skip schedule already running: "
+                f"{schedule_vo.schedule_id} (running_since = "
+                f"{schedule_vo.running_since})"
+            )
+            return
+
+        started_at = time.time()
+        history_run_vo = None
+        status = "FAILURE"
+        row_count = 0
+
+        # Everything after start_run is guarded, so running_since is
+        # cleared even if the run can not be recorded.
+        try:
+            history_run_vo = self.history_mgr.create_history_run(schedule_vo, domain_id)
+            response = self.resource_mgr.stat(
+                aggregate, page, domain_id, shared_results=shared_results
+            )
+
+            results = response.get("results", [])
+            self.history_mgr.create_history(
+                schedule_vo, topic, results, domain_id, history_run_vo.run_id
+            )
+            status, row_count = "SUCCESS", len(results)
+        except Exception as e:
+            # create_batch carries on after a failed schedule, so the
+            # transaction is not rolled back and partially inserted rows
+            # are removed here.
+            if history_run_vo is not None:
+                self.history_mgr.delete_history_by_run_id(history_run_vo.run_id)
+            raise e
+        finally:
+            self._finish_run(schedule_vo, history_run_vo, status, started_at, row_count)
+
+    def _finish_run(
+        self,
+        schedule_vo,
+        history_run_vo,
+        status: str,
+        started_at: float,
+        row_count: int = 0,
+    ) -> None:
+        schedule_mgr: ScheduleManager = self.locator.get_manager("ScheduleManager")
+        duration = round(time.time() - started_at, 3)
+
+        if history_run_vo is not None:
+            self.history_mgr.update_history_run_by_vo(
+                {
+                    "status": status,
+                    "row_count": row_count,
+                    "duration": duration,
+                    "finished_at": datetime.utcnow(),
+                },
+                history_run_vo,
+            )
+
+        schedule_mgr.finish_run(schedule_vo, status, duration, row_count)
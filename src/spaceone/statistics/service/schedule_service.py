@@ -1,9 +1,12 @@
 import logging
 import copy
+from datetime import datetime
 
 from spaceone.core.service import *
 
 from spaceone.statistics.error import *
+from spaceone.statistics.lib.next_run import get_next_run_at
+from spaceone.statistics.lib.rollup import ROLLUP_PERIODS
 from spaceone.statistics.manager.resource_manager import ResourceManager
 from spaceone.statistics.manager.schedule_manager import ScheduleManager
 from spaceone.statistics.model import Schedule
@@ -36,6 +39,7 @@ class ScheduleService(BaseService):
                 'topic': 'str',      # required
                 'options': 'dict',   # required
                 'schedule': 'dict',  # required
+                'retention': 'dict',
                 'tags': 'dict',
                 'domain_id': 'str'   # injected from auth (required)
             }
@@ -49,6 +53,7 @@ class ScheduleService(BaseService):
         schedule = params["schedule"]
 
         self._check_schedule(schedule)
+        self._check_retention(params.get("retention"))
         self._verify_query_option(options, domain_id)
         return self.schedule_mgr.add_schedule(params)
 
@@ -64,6 +69,7 @@ class ScheduleService(BaseService):
             params (dict): {
                 'schedule_id': 'str',   # required
                 'schedule': 'dict',
+                'retention': 'dict',
                 'tags': 'dict',
                 'domain_id': 'str'      # injected from auth (required)
             }
@@ -72,11 +78,17 @@ class ScheduleService(BaseService):
             schedule_vo
         """
         self._check_schedule(params.get("schedule"))
+        self._check_retention(params.get("retention"))
 
         schedule_vo = self.schedule_mgr.get_schedule(
             params["schedule_id"], params["domain_id"]
         )
 
+        if "schedule" in params:
+            params["next_run_at"] = self.schedule_mgr.get_next_run_at(
+                schedule_vo.schedule_id, params["schedule"], datetime.utcnow()
+            )
+
         return self.schedule_mgr.update_schedule_by_vo(params, schedule_vo)
 
     @transaction(
@@ -101,8 +113,14 @@ class ScheduleService(BaseService):
         schedule_id = params["schedule_id"]
 
         schedule_vo = self.schedule_mgr.get_schedule(schedule_id, domain_id)
+        next_run_at = self.schedule_mgr.get_next_run_at(
+            schedule_vo.schedule_id,
+            schedule_vo.schedule.to_dict() if schedule_vo.schedule else None,
+            datetime.utcnow(),
+        )
+
         return self.schedule_mgr.update_schedule_by_vo(
-            {"state": "ENABLED"}, schedule_vo
+            {"state": "ENABLED", "next_run_at": next_run_at}, schedule_vo
         )
 
     @transaction(
@@ -250,11 +268,65 @@ class ScheduleService(BaseService):
         result = mgr.list_domains(query)
         return result
 
+    @transaction(exclude=["authentication", "authorization", "mutation"])
+    def list_due_schedules(self, params):
+        """This is used by Scheduler
+
+        Finds the enabled schedules of the given domains whose next_run_at has
+        passed and moves their next_run_at forward.
+
+        Args:
+            params (dict): {
+                'domain_ids': 'list',    # domains to dispatch, all if omitted
+                'job_limit': 'int',      # max jobs opened by schedules of the current hour
+                'domain_limit': 'int',   # max schedules of the current hour per domain
+                'job_size': 'int'        # max schedules per job, one job per domain if 0
+            }
+
+        Returns:
+            results (list)
+            total_count (int)
+        """
+
+        schedules = self.schedule_mgr.list_due_schedules(
+            datetime.utcnow(),
+            params.get("domain_ids"),
+            params.get("job_limit"),
+            params.get("domain_limit"),
+            params.get("job_size", 0),
+        )
+        return {"results": schedules, "total_count": len(schedules)}
+
     @staticmethod
     def _check_schedule(schedule: dict) -> None:
         if schedule and len(schedule) > 1:
             raise ERROR_SCHEDULE_OPTION()
 
+        try:
+            get_next_run_at(schedule, datetime.utcnow())
+        except (ValueError, TypeError) as e:
+            raise ERROR_INVALID_PARAMETER(key="schedule", reason=str(e))
+
+    @staticmethod
+    def _check_retention(retention: dict) -> None:
+        if retention is None:
+            return
+
+        if not retention.get("raw_days"):
+            raise ERROR_RETENTION_OPTION(reason="raw_days is required.")
+
+        if retention.get("rollup", "DAILY") not in ROLLUP_PERIODS:
+            raise ERROR_RETENTION_OPTION(
+                reason=f"rollup must be one of {ROLLUP_PERIODS}."
+            )
+
+        metrics = retention.get("metrics")
+        if metrics is not None and not (
+            isinstance(metrics, list)
+            and all(isinstance(metric, str) for metric in metrics)
+        ):
+            raise ERROR_RETENTION_OPTION(reason="metrics must be a list of strings.")
+
     def _verify_query_option(self, options: dict, domain_id: str) -> None:
         aggregate = options.get("aggregate", [])
         page = options.get("page", {})
@@ -0,0 +1,155 @@
+"""Compares per-row, bulk and bucket inserts of HistoryManager.create_history.
+
+For each layout the stored BSON size and the number of documents are reported.
+
+Runs against mongomock by default, or a local MongoDB with --host.
+
+Usage:
+    python -m test.benchmark.benchmark_history_manager \\
+        [--rows 1000 10000 50000] [--host mongodb://localhost:27017]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+import bson
+from mongoengine import connect, disconnect
+
+from spaceone.core import config, utils
+from spaceone.statistics.conf import global_conf
+from spaceone.statistics.manager.history_manager import HistoryManager
+from spaceone.statistics.model.history_model import History
+from spaceone.statistics.model.history_bucket_model import HistoryBucket
+from spaceone.statistics.model.schedule_model import Schedule
+
+
+def _make_results(rows: int) -> list:
+    return [
+        {
+            "project_id": f"project-{index % 500}",
+            "provider": ["aws", "google_cloud", "azure"][index % 3],
+            "server_count": index % 97,
+            "cost": round(index * 0.37, 2),
+        }
+        for index in range(rows)
+    ]
+
+
+def _create_history_per_row(schedule_vo, topic, results, domain_id):
+    created_at = datetime.utcnow()
+    for values in results:
+        History.create(
+            {
+                "topic": topic,
+                "schedule": schedule_vo,
+                "values": values,
+                "created_at": created_at,
+                "domain_id": domain_id,
+            }
+        )
+
+
+def _measure(func, *args) -> dict:
+    History.objects.delete()
+    HistoryBucket.objects.delete()
+    started_at = time.perf_counter()
+    func(*args)
+    seconds = round(time.perf_counter() - started_at, 4)
+
+    documents = 0
+    stored_bytes = 0
+    for model in [History, HistoryBucket]:
+        for document in model._get_collection().find():
+            documents += 1
+            stored_bytes += len(bson.encode(document))
+
+    return {"seconds": seconds, "documents": documents, "bytes": stored_bytes}
+
+
+def _create_history_buckets(history_mgr, *args):
+    history_mgr.bucket_storage = True
+    try:
+        history_mgr.create_history(*args)
+    finally:
+        history_mgr.bucket_storage = False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--bucket-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    # set_global skips keys that init_conf did not set, so the package
+    # settings are loaded first and the sizes are set explicitly.
+    config.init_conf(package="spaceone.statistics")
+    config.set_global_force(
+        **{key: value for key, value in vars(global_conf).items() if key.isupper()}
+    )
+    config.set_global_force(
+        HISTORY_INSERT_BATCH_SIZE=args.batch_size,
+        HISTORY_BUCKET_SIZE=args.bucket_size,
+    )
+    if args.host:
+        connect("statistics_benchmark", host=args.host)
+    else:
+        import mongomock
+
+        connect(
+            "statistics_benchmark",
+            host="mongodb://localhost",
+            mongo_client_class=mongomock.MongoClient,
+        )
+
+    domain_id = utils.generate_id("domain")
+    schedule_vo = Schedule.create(
+        {"topic": "benchmark", "options": {"aggregate": []}, "domain_id": domain_id}
+    )
+
+    history_mgr = HistoryManager()
+
+    report = []
+    for rows in args.rows:
+        results = _make_results(rows)
+        report.append(
+            {
+                "rows": rows,
+                "per_row": _measure(
+                    _create_history_per_row,
+                    schedule_vo,
+                    "benchmark",
+                    results,
+                    domain_id,
+                ),
+                "bulk": _measure(
+                    history_mgr.create_history,
+                    schedule_vo,
+                    "benchmark",
+                    results,
+                    domain_id,
+                ),
+                "bucket": _measure(
+                    _create_history_buckets,
+                    history_mgr,
+                    schedule_vo,
+                    "benchmark",
+                    results,
+                    domain_id,
+                ),
+            }
+        )
+
+    History.objects.delete()
+    HistoryBucket.objects.delete()
+    schedule_vo.delete()
+    disconnect()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
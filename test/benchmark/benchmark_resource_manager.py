@@ -0,0 +1,171 @@
+"""Offline benchmark of ResourceManager.stat with a fake SpaceConnector.
+
+Usage:
+    python -m test.benchmark.benchmark_resource_manager \\
+        [--rows 10000] [--cardinality 10000] [--latency-ms 20] [--repeat 5] \\
+        [--max-workers 8] [--no-plan-optimizer] [--output result.json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from unittest.mock import patch
+
+from spaceone.core import config
+from spaceone.core.auth.jwt.jwt_util import JWTUtil
+from spaceone.core.transaction import get_transaction
+from spaceone.statistics.conf import global_conf
+from spaceone.statistics.manager.resource_manager import ResourceManager
+from test.benchmark.fake_space_connector import FakeSpaceConnector
+
+DOMAIN_ID = "domain-benchmark"
+
+
+def _make_query(resource_type: str, keys: list, fields: list) -> dict:
+    return {
+        "resource_type": resource_type,
+        "query": {
+            "aggregate": [
+                {
+                    "group": {
+                        "keys": [{"key": key, "name": key} for key in keys],
+                        "fields": [
+                            {"key": field, "name": field, "operator": "sum"}
+                            for field in fields
+                        ],
+                    }
+                }
+            ]
+        },
+    }
+
+
+def _make_pipelines() -> dict:
+    base = _make_query("identity.Project", ["project_id"], ["member_count"])
+    servers = _make_query("inventory.Server", ["project_id"], ["server_count"])
+    cloud_services = _make_query(
+        "inventory.CloudService", ["project_id"], ["cloud_service_count"]
+    )
+    costs = _make_query("cost_analysis.Cost", ["project_id"], ["cost"])
+
+    return {
+        "single_query": [{"query": base}],
+        "multi_join": [
+            {"query": base},
+            {"join": dict(servers, keys=["project_id"])},
+            {"join": dict(cloud_services, keys=["project_id"])},
+            {"join": dict(costs, keys=["project_id"])},
+        ],
+        "concat_fan_in": [
+            {"query": servers},
+            {"concat": dict(servers, extend_data={"provider": "aws"})},
+            {"concat": dict(servers, extend_data={"provider": "google_cloud"})},
+            {"concat": dict(servers, extend_data={"provider": "azure"})},
+        ],
+        "formula_chain": [
+            {"query": base},
+            {"join": dict(servers, keys=["project_id"])},
+            {"join": dict(costs, keys=["project_id"])},
+            {"formula": {"eval": "total = server_count + member_count"}},
+            {"formula": {"eval": "cost_per_server = cost / server_count"}},
+            {"formula": {"query": "cost_per_server > 1"}},
+        ],
+        "sort_page": [
+            {"query": base},
+            {"join": dict(costs, keys=["project_id"])},
+            {"sort": [{"key": "cost", "desc": True}]},
+        ],
+    }
+
+
+def _run(resource_mgr, aggregate: list, page: dict, repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        resource_mgr.stat(aggregate, page, DOMAIN_ID)
+        durations.append((time.perf_counter() - started_at) * 1000)
+
+    return {
+        "min_ms": round(min(durations), 3),
+        "median_ms": round(statistics.median(durations), 3),
+        "mean_ms": round(statistics.mean(durations), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--cardinality", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-workers", type=int, default=global_conf.STAT_QUERY_MAX_WORKERS
+    )
+    parser.add_argument("--no-plan-optimizer", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    # init_conf only loads the defaults of spaceone-core and set_global skips
+    # unknown keys, so the package settings are loaded and every flag under
+    # test is set explicitly.
+    stat_conf = {
+        "STAT_QUERY_MAX_WORKERS": args.max_workers,
+        "STAT_PLAN_OPTIMIZER": not args.no_plan_optimizer,
+        "STAT_SINGLE_FLIGHT": False,
+        "STAT_PROFILE_LOG": False,
+        "STAT_QUERY_CACHE": {**global_conf.STAT_QUERY_CACHE, "enabled": False},
+    }
+
+    config.init_conf(package="spaceone.statistics")
+    config.set_global_force(
+        **{key: value for key, value in vars(global_conf).items() if key.isupper()}
+    )
+    config.set_global_force(**stat_conf)
+
+    connector = FakeSpaceConnector(
+        rows=args.rows, cardinality=args.cardinality, latency_ms=args.latency_ms
+    )
+    token_values = {"typ": "SYSTEM_TOKEN", "did": DOMAIN_ID}
+
+    with patch.object(
+        JWTUtil,
+        "get_value_from_token",
+        side_effect=lambda token, key: token_values.get(key),
+    ):
+        get_transaction().set_meta("token", "benchmark-token")
+        resource_mgr = ResourceManager()
+        resource_mgr.locator.get_connector = lambda *args, **kwargs: connector
+
+        benchmarks = []
+        for name, aggregate in _make_pipelines().items():
+            page = {"limit": 10} if name == "sort_page" else {}
+            call_count = connector.call_count
+            result = _run(resource_mgr, aggregate, page, args.repeat)
+            result.update(
+                {
+                    "name": name,
+                    "upstream_calls": (connector.call_count - call_count)
+                    // args.repeat,
+                }
+            )
+            benchmarks.append(result)
+
+    report = {
+        "rows": args.rows,
+        "cardinality": args.cardinality,
+        "latency_ms": args.latency_ms,
+        "repeat": args.repeat,
+        "config": stat_conf,
+        "benchmarks": benchmarks,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
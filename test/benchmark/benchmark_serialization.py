@@ -0,0 +1,74 @@
+"""Compares the legacy and columnar record serialization of ResourceManager.
+
+Usage:
+    python -m test.benchmark.benchmark_serialization [--rows 100000 1000000]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from spaceone.statistics.manager.resource_manager import ResourceManager
+
+
+def _make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "project_id": rng.integers(0, 1000, rows).astype(str),
+            "provider": rng.choice(["aws", "google_cloud", "azure"], rows),
+            "server_count": rng.integers(0, 500, rows),
+            "cost": rng.random(rows) * 1000,
+            "usage": rng.random(rows),
+        }
+    )
+    df.loc[rng.random(rows) < 0.1, "cost"] = np.nan
+    df.loc[rng.random(rows) < 0.1, "provider"] = None
+    return df
+
+
+def _legacy_to_records(df: pd.DataFrame) -> list:
+    df = df.replace({np.nan: None})
+    return df.to_dict("records")
+
+
+def _measure(func, df: pd.DataFrame) -> dict:
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    func(df)
+    elapsed = time.perf_counter() - started_at
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": round(elapsed, 4), "peak_mb": round(peak / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        df = _make_frame(rows)
+        assert _legacy_to_records(df.head(1000)) == ResourceManager._to_records(
+            df.head(1000)
+        )
+
+        results.append(
+            {
+                "rows": rows,
+                "legacy": _measure(_legacy_to_records, df),
+                "columnar": _measure(ResourceManager._to_records, df),
+            }
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+import random
+import threading
+import time
+
+__all__ = ["FakeSpaceConnector"]
+
+
+class FakeSpaceConnector:
+    """Local stand-in for SpaceConnector that answers '*.stat' calls.
+
+    Results are generated from the group keys and fields of the query,
+    so the same query always returns the same rows. As with a real group
+    stage, a grouped query returns one row per distinct key, which is
+    min(rows, cardinality) rows, so joins on the group keys match 1:1.
+    Ungrouped queries return all rows with repeating values.
+    """
+
+    def __init__(self, rows=1000, cardinality=100, latency_ms=0, seed=0):
+        self.rows = rows
+        self.cardinality = cardinality
+        self.latency_ms = latency_ms
+        self.seed = seed
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+    def dispatch(self, method: str, params: dict = None, **kwargs) -> dict:
+        with self._lock:
+            self.call_count += 1
+
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+        query = (params or {}).get("query", {})
+        keys, fields, grouped = self._get_group(query)
+        rng = random.Random(f"{self.seed}:{method}:{json.dumps(query, sort_keys=True)}")
+
+        row_count = min(self.rows, self.cardinality) if grouped else self.rows
+
+        results = []
+        for index in range(row_count):
+            row = {key: f"{key}-{index % self.cardinality}" for key in keys}
+            for field in fields:
+                row[field] = round(rng.random() * 1000, 2)
+
+            results.append(row)
+
+        return {"results": results}
+
+    @staticmethod
+    def _get_group(query: dict):
+        for stage in query.get("aggregate", []):
+            if "group" in stage:
+                keys = [key["name"] for key in stage["group"].get("keys", [])]
+                fields = [field["name"] for field in stage["group"].get("fields", [])]
+                return keys, fields, True
+
+        return ["value"], [], False
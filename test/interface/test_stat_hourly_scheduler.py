@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+
+from spaceone.core import config
+from spaceone.statistics.interface.task.stat_hourly_scheduler import (
+    StatHourlyScheduler,
+)
+
+
+class TestStatHourlyScheduler(unittest.TestCase):
+    def setUp(self):
+        config.init_conf(package="spaceone.statistics")
+        config.set_global_force(TOKEN="token", STAT_SCHEDULER_JOB_SIZE=2)
+
+        patcher = patch.object(StatHourlyScheduler, "list_domains")
+        self.list_domains = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.list_domains.return_value = [
+            {"domain_id": "domain-a"},
+            {"domain_id": "domain-b"},
+        ]
+
+        self.scheduler = StatHourlyScheduler("statistics_q", 3600)
+
+    def tearDown(self):
+        config.init_conf(package="spaceone.statistics")
+
+    @staticmethod
+    def _get_jobs(jobs):
+        return [
+            [stage["params"]["params"]["schedule_id"] for stage in job["stages"]]
+            for job in jobs
+        ]
+
+    def test_create_task_interleaves_domains(self):
+        with patch.object(
+            self.scheduler,
+            "_list_due_schedules",
+            return_value={
+                "domain-a": ["schedule-a1", "schedule-a2", "schedule-a3"],
+                "domain-b": ["schedule-b1"],
+            },
+        ) as list_due_schedules:
+            jobs = self.scheduler.create_task()
+
+        list_due_schedules.assert_called_once_with(["domain-a", "domain-b"], 2)
+        self.assertEqual(
+            self._get_jobs(jobs),
+            [["schedule-a1", "schedule-a2"], ["schedule-b1"], ["schedule-a3"]],
+        )
+
+    def test_create_task_without_domains(self):
+        self.list_domains.return_value = []
+
+        with patch.object(self.scheduler, "_list_due_schedules") as list_due_schedules:
+            self.assertEqual(self.scheduler.create_task(), [])
+
+        list_due_schedules.assert_not_called()
+
+    def test_list_due_schedules_with_domain_limit(self):
+        config.set_global_force(STAT_SCHEDULER_MAX_DOMAIN_SCHEDULES=2)
+
+        with patch.object(self.scheduler.locator, "get_service") as get_service:
+            schedule_svc = get_service.return_value
+            schedule_svc.list_due_schedules.return_value = {
+                "results": [
+                    {"schedule_id": "schedule-a1", "domain_id": "domain-a"},
+                    {"schedule_id": "schedule-b1", "domain_id": "domain-b"},
+                    {"schedule_id": "schedule-a2", "domain_id": "domain-a"},
+                ],
+                "total_count": 3,
+            }
+
+            schedules_by_domain = self.scheduler._list_due_schedules(
+                ["domain-a", "domain-b"], 2
+            )
+
+        params = schedule_svc.list_due_schedules.call_args[0][0]
+        self.assertEqual(params["domain_limit"], 2)
+        self.assertEqual(params["job_size"], 2)
+        self.assertEqual(
+            schedules_by_domain,
+            {
+                "domain-a": ["schedule-a1", "schedule-a2"],
+                "domain-b": ["schedule-b1"],
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
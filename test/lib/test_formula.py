@@ -0,0 +1,60 @@
+import unittest
+
+from spaceone.statistics.error import *
+from spaceone.statistics.lib.formula import compile_formula
+
+
+class TestFormula(unittest.TestCase):
+    def test_compile_eval_formula(self):
+        formula = compile_formula("total = server_count + `cloud service count`")
+
+        self.assertTrue(formula.is_assignment)
+        self.assertEqual(formula.targets, ["total"])
+        self.assertEqual(formula.columns, {"server_count", "cloud service count"})
+
+    def test_compile_query_formula(self):
+        formula = compile_formula("cost > 100 and provider in ['aws']", "query")
+
+        self.assertFalse(formula.is_assignment)
+        self.assertEqual(formula.columns, {"cost", "provider"})
+
+    def test_compiled_formula_is_cached(self):
+        self.assertIs(compile_formula("a = b * 2"), compile_formula("a = b * 2"))
+
+    def test_reject_unsafe_formula(self):
+        for expression in ["__import__('os')", "a.__class__", "lambda: 1", "a[0]"]:
+            with self.assertRaises(ERROR_STATISTICS_FORMULA_NOT_ALLOWED):
+                compile_formula(expression)
+
+    def test_compile_allowed_methods(self):
+        for expression in [
+            "name.str.contains('prod')",
+            "created_at.dt.year == 2024",
+            "cost = cost.fillna(0).round(2)",
+            "usage = usage.abs()",
+        ]:
+            self.assertEqual(compile_formula(expression).engine, "python")
+
+    def test_reject_unknown_methods(self):
+        for expression in [
+            "count.to_pickle('/tmp/count')",
+            "count.to_csv('/tmp/count.csv')",
+            "count.apply(abs)",
+            "count.fillna(0).to_pickle('/tmp/count')",
+            "name.str.cat(provider)",
+            "created_at.dt.tz_localize('UTC')",
+        ]:
+            with self.assertRaises(ERROR_STATISTICS_FORMULA_NOT_ALLOWED):
+                compile_formula(expression)
+
+    def test_reject_assignment_in_query(self):
+        with self.assertRaises(ERROR_STATISTICS_FORMULA_NOT_ALLOWED):
+            compile_formula("a = b", "query")
+
+    def test_invalid_formula(self):
+        with self.assertRaises(ERROR_STATISTICS_FORMULA):
+            compile_formula("a = = b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import io
+import json
+import unittest
+from datetime import datetime
+
+from spaceone.statistics.lib.history_export import (
+    export_history,
+    is_parquet_supported,
+)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def _make_batches() -> list:
+    created_at = datetime(2024, 5, 16, 13, 0)
+    return [
+        [
+            {
+                "topic": "server",
+                "values": {"project_id": "project-a", "count": 3},
+                "created_at": created_at,
+            },
+            {
+                "topic": "server",
+                "values": {"project_id": "project-b", "count": 1},
+                "created_at": created_at,
+            },
+        ],
+        [
+            {
+                "topic": "server",
+                "values": {"project_id": "project-c", "region": "us-east-1"},
+                "created_at": created_at,
+            }
+        ],
+    ]
+
+
+class TestHistoryExport(unittest.TestCase):
+    def test_export_ndjson(self):
+        chunks = list(export_history(iter(_make_batches()), "NDJSON"))
+        lines = b"".join(chunks).decode().splitlines()
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(
+            json.loads(lines[0]),
+            {
+                "topic": "server",
+                "values": {"project_id": "project-a", "count": 3},
+                "created_at": "2024-05-16T13:00:00.000Z",
+            },
+        )
+
+    def test_export_csv(self):
+        chunks = list(export_history(iter(_make_batches()), "CSV"))
+        lines = b"".join(chunks).decode().splitlines()
+
+        self.assertEqual(
+            lines,
+            [
+                "meta.topic,meta.created_at,project_id,count",
+                "server,2024-05-16T13:00:00.000Z,project-a,3",
+                "server,2024-05-16T13:00:00.000Z,project-b,1",
+                "server,2024-05-16T13:00:00.000Z,project-c,",
+            ],
+        )
+
+    def test_export_csv_with_columns(self):
+        chunks = export_history(
+            iter(_make_batches()), "CSV", columns=["project_id", "region"]
+        )
+        lines = b"".join(chunks).decode().splitlines()
+
+        self.assertEqual(
+            lines,
+            ["project_id,region", "project-a,", "project-b,", "project-c,us-east-1"],
+        )
+
+    def test_export_csv_with_meta_named_values(self):
+        batches = [
+            [
+                {
+                    "topic": "server",
+                    "values": {"topic": "network", "created_at": "2024-05-01"},
+                    "created_at": datetime(2024, 5, 16, 13, 0),
+                }
+            ]
+        ]
+        lines = b"".join(export_history(iter(batches), "CSV")).decode().splitlines()
+
+        self.assertEqual(
+            lines,
+            [
+                "meta.topic,meta.created_at,topic,created_at",
+                "server,2024-05-16T13:00:00.000Z,network,2024-05-01",
+            ],
+        )
+
+    @unittest.skipUnless(is_parquet_supported(), "pyarrow is not installed")
+    def test_export_parquet_with_changing_types(self):
+        created_at = datetime(2024, 5, 16, 13, 0)
+        batches = [
+            [{"topic": "server", "values": {"count": 3}, "created_at": created_at}],
+            [
+                {
+                    "topic": "server",
+                    "values": {"count": 1.5, "region": "us-east-1"},
+                    "created_at": created_at,
+                }
+            ],
+        ]
+        columns = ["count", "region"]
+
+        data = b"".join(export_history(iter(batches), "PARQUET", columns))
+        table = pq.read_table(io.BytesIO(data))
+
+        self.assertEqual(
+            table.to_pylist(),
+            [
+                {"count": 3.0, "region": None},
+                {"count": 1.5, "region": "us-east-1"},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime
+
+from bson import ObjectId
+
+from spaceone.statistics.lib.keyset import (
+    decode_cursor,
+    encode_cursor,
+    make_cursor_query,
+)
+
+
+class TestKeyset(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        created_at = datetime(2024, 5, 16, 13, 0, 0, 123000)
+        _id = ObjectId()
+
+        cursor = encode_cursor(created_at, _id)
+
+        self.assertEqual(decode_cursor(cursor), {"created_at": created_at, "_id": _id})
+        self.assertEqual(
+            decode_cursor(encode_cursor(created_at, _id, 3))["row_index"], 3
+        )
+
+    def test_decode_malformed_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_make_cursor_query(self):
+        created_at = datetime(2024, 5, 16)
+        _id = ObjectId()
+
+        query = make_cursor_query({"created_at": created_at, "_id": _id})
+
+        self.assertEqual(
+            query,
+            {
+                "$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": _id}},
+                ]
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
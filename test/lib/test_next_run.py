@@ -0,0 +1,93 @@
+import unittest
+from datetime import datetime
+
+from spaceone.statistics.lib.next_run import (
+    CronExpression,
+    get_next_run_at,
+    get_spread_offset,
+)
+
+
+class TestNextRun(unittest.TestCase):
+    def test_hours(self):
+        after = datetime(2024, 5, 16, 6, 0)
+
+        self.assertEqual(
+            get_next_run_at({"hours": [18, 6]}, after), datetime(2024, 5, 16, 18, 0)
+        )
+        self.assertEqual(
+            get_next_run_at({"hours": [6]}, after), datetime(2024, 5, 17, 6, 0)
+        )
+
+    def test_minutes(self):
+        after = datetime(2024, 5, 16, 23, 50, 30)
+
+        self.assertEqual(
+            get_next_run_at({"minutes": [0, 30]}, after), datetime(2024, 5, 17, 0, 0)
+        )
+
+    def test_interval(self):
+        after = datetime(2024, 5, 16, 6, 7, 59)
+
+        self.assertEqual(
+            get_next_run_at({"interval": 15}, after), datetime(2024, 5, 16, 6, 15)
+        )
+        self.assertEqual(
+            get_next_run_at({"interval": 15}, datetime(2024, 5, 16, 6, 14)),
+            datetime(2024, 5, 16, 6, 15),
+        )
+
+    def test_cron(self):
+        after = datetime(2024, 5, 16, 13, 45)
+
+        self.assertEqual(
+            get_next_run_at({"cron": "*/20 9-17 * * mon-fri"}, after),
+            datetime(2024, 5, 16, 14, 0),
+        )
+        self.assertEqual(
+            get_next_run_at({"cron": "30 2 1 * *"}, after), datetime(2024, 6, 1, 2, 30)
+        )
+        self.assertEqual(
+            get_next_run_at({"cron": "0 0 29 2 *"}, after), datetime(2028, 2, 29, 0, 0)
+        )
+
+    def test_cron_with_day_and_weekday(self):
+        # Day 1 of the month or any Sunday
+        cron = CronExpression("0 0 1 * 0")
+
+        self.assertEqual(cron.get_next(datetime(2024, 5, 16)), datetime(2024, 5, 19))
+        self.assertEqual(cron.get_next(datetime(2024, 5, 27)), datetime(2024, 6, 1))
+
+    def test_invalid_cron(self):
+        for expression in ["* * * *", "60 * * * *", "*/0 * * * *", "a * * * *"]:
+            with self.assertRaises(ValueError):
+                CronExpression(expression)
+
+    def test_spread_offset(self):
+        scheduled = {"hours": [6]}
+        offset = get_spread_offset("sch-123", scheduled, 1800)
+
+        self.assertEqual(offset, get_spread_offset("sch-123", scheduled, 1800))
+        self.assertTrue(0 <= offset < 1800)
+        self.assertEqual(get_spread_offset("sch-123", {"minutes": [0]}, 1800), 0)
+        self.assertTrue(get_spread_offset("sch-123", scheduled, 7200) < 3600)
+
+    def test_next_run_with_offset(self):
+        scheduled = {"hours": [6, 7]}
+
+        # The run of 6:00 is at 6:20 and still ahead at 6:10.
+        self.assertEqual(
+            get_next_run_at(scheduled, datetime(2024, 5, 16, 6, 10), 1200),
+            datetime(2024, 5, 16, 6, 20),
+        )
+        self.assertEqual(
+            get_next_run_at(scheduled, datetime(2024, 5, 16, 6, 20), 1200),
+            datetime(2024, 5, 16, 7, 20),
+        )
+
+    def test_no_schedule(self):
+        self.assertIsNone(get_next_run_at({}, datetime(2024, 5, 16)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+
+from spaceone.statistics.lib.plan_optimizer import PlanOptimizer, get_upstream_columns
+
+
+def _make_query(resource_type: str, group_keys: list, fields: list, **options) -> dict:
+    return {
+        "resource_type": resource_type,
+        "query": {
+            "aggregate": [
+                {
+                    "group": {
+                        "keys": [{"key": key, "name": key} for key in group_keys],
+                        "fields": [
+                            {"key": field, "name": field, "operator": "sum"}
+                            for field in fields
+                        ],
+                    }
+                }
+            ]
+        },
+        **options,
+    }
+
+
+class TestPlanOptimizer(unittest.TestCase):
+    def test_get_upstream_columns(self):
+        options = _make_query(
+            "inventory.Server", ["project_id"], ["count"], extend_data={"type": "vm"}
+        )
+
+        self.assertEqual(get_upstream_columns(options), {"project_id", "count", "type"})
+
+    def test_keep_sort_before_tie_break_sort(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["name"], ["cost"])},
+            {"sort": [{"key": "name"}]},
+            {"sort": [{"key": "cost", "desc": True}]},
+        ]
+
+        self.assertEqual(PlanOptimizer(aggregate).optimize(), aggregate)
+
+    def test_drop_duplicate_sort(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["name"], ["cost"])},
+            {"sort": [{"key": "cost", "desc": True}]},
+            {"sort": [{"key": "cost", "desc": True}]},
+        ]
+
+        self.assertEqual(PlanOptimizer(aggregate).optimize(), aggregate[:2])
+
+    def test_keep_sort_before_order_dependent_eval(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["project_id"], ["count"])},
+            {"sort": [{"key": "count", "desc": True}]},
+            {"formula": {"eval": "is_large = count.between(10, 100)"}},
+            {"sort": [{"key": "project_id"}]},
+        ]
+
+        self.assertEqual(PlanOptimizer(aggregate).optimize(), aggregate)
+
+    def test_keep_filter_after_eval(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["project_id"], ["count"])},
+            {"formula": {"eval": "double_count = count * 2"}},
+            {"formula": {"query": "count > 10"}},
+        ]
+
+        self.assertEqual(PlanOptimizer(aggregate).optimize(), aggregate)
+
+    def test_fuse_formula_eval(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["project_id"], ["count"])},
+            {"formula": {"eval": "a = count * 2"}},
+            {"formula": {"eval": "b = a + 1"}},
+        ]
+
+        optimized = PlanOptimizer(aggregate).optimize()
+
+        self.assertEqual(
+            optimized[1], {"formula": {"eval": "a = count * 2\nb = a + 1"}}
+        )
+        self.assertEqual(len(optimized), 2)
+
+    def test_drop_fill_na_refilled_after_outer_join(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["project_id"], ["count"])},
+            {"fill_na": {"data": {"count": 0}}},
+            {
+                "join": _make_query(
+                    "cost_analysis.Cost",
+                    ["project_id"],
+                    ["cost"],
+                    keys=["project_id"],
+                    type="OUTER",
+                )
+            },
+            {"fill_na": {"data": {"count": 0, "cost": 0}}},
+        ]
+
+        optimized = PlanOptimizer(aggregate).optimize()
+
+        self.assertEqual(optimized, [aggregate[0], aggregate[2], aggregate[3]])
+
+    def test_move_filter_before_join(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["project_id"], ["count"])},
+            {
+                "join": _make_query(
+                    "inventory.Server",
+                    ["project_id"],
+                    ["server_count"],
+                    keys=["project_id"],
+                )
+            },
+            {"formula": {"query": "count > 10"}},
+        ]
+
+        optimized = PlanOptimizer(aggregate).optimize()
+
+        self.assertEqual(optimized, [aggregate[0], aggregate[2], aggregate[1]])
+
+    def test_keep_filter_on_joined_column(self):
+        aggregate = [
+            {"query": _make_query("identity.Project", ["project_id"], ["count"])},
+            {
+                "join": _make_query(
+                    "inventory.Server",
+                    ["project_id"],
+                    ["server_count"],
+                    keys=["project_id"],
+                )
+            },
+            {"formula": {"query": "server_count > 10"}},
+        ]
+
+        self.assertEqual(PlanOptimizer(aggregate).optimize(), aggregate)
+
+    def test_push_down_filter_on_group_keys(self):
+        aggregate = [
+            {"query": _make_query("inventory.Server", ["provider"], ["count"])},
+            {"formula": {"query": "provider in ['aws', 'azure'] and count > 10"}},
+        ]
+
+        optimized = PlanOptimizer(aggregate).optimize()
+
+        self.assertEqual(
+            optimized[0]["query"]["query"]["filter"],
+            [{"k": "provider", "v": ["aws", "azure"], "o": "in"}],
+        )
+        self.assertEqual(optimized[1], aggregate[1])
+        self.assertNotIn("filter", aggregate[0]["query"]["query"])
+
+    def test_keep_filter_on_limited_groups(self):
+        top_projects = _make_query("inventory.Server", ["project_id"], ["count"])
+        top_projects["query"]["aggregate"] += [
+            {"sort": {"key": "count", "desc": True}},
+            {"limit": 5},
+        ]
+        paged_projects = _make_query("inventory.Server", ["project_id"], ["count"])
+        paged_projects["query"]["page"] = {"limit": 5}
+
+        for options in [top_projects, paged_projects]:
+            aggregate = [
+                {"query": options},
+                {"formula": {"query": "project_id == 'project-a'"}},
+            ]
+
+            self.assertEqual(PlanOptimizer(aggregate).optimize(), aggregate)
+
+
+if __name__ == "__main__":
+    unittest.main()
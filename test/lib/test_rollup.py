@@ -0,0 +1,108 @@
+import unittest
+from datetime import datetime
+
+from spaceone.statistics.lib.rollup import (
+    get_metric_columns,
+    get_period_range,
+    rollup_rows,
+)
+
+
+class TestRollup(unittest.TestCase):
+    def test_get_period_range(self):
+        created_at = datetime(2024, 5, 16, 13, 45)
+
+        self.assertEqual(
+            get_period_range(created_at, "DAILY"),
+            (datetime(2024, 5, 16), datetime(2024, 5, 17)),
+        )
+        self.assertEqual(
+            get_period_range(created_at, "WEEKLY"),
+            (datetime(2024, 5, 13), datetime(2024, 5, 20)),
+        )
+
+    def test_rollup_rows(self):
+        rows = [
+            (datetime(2024, 5, 16, 2), {"project_id": "project-a", "count": 4}),
+            (datetime(2024, 5, 16, 0), {"project_id": "project-a", "count": 2}),
+            (datetime(2024, 5, 16, 1), {"project_id": "project-a", "count": 9}),
+            (datetime(2024, 5, 16, 0), {"project_id": "project-b", "count": None}),
+        ]
+
+        rollups = {
+            rollup["key"]["project_id"]: rollup
+            for rollup in rollup_rows(rows, ["count"])
+        }
+
+        self.assertEqual(
+            rollups["project-a"]["values"], {"count": {"last": 4, "avg": 5, "max": 9}}
+        )
+        self.assertEqual(rollups["project-a"]["sample_count"], 3)
+        self.assertEqual(rollups["project-b"]["values"], {})
+        self.assertEqual(rollups["project-b"]["sample_count"], 1)
+
+    def test_rollup_rows_with_mixed_column(self):
+        rows = [
+            (datetime(2024, 5, 16, 0), {"region": 1, "count": 1}),
+            (datetime(2024, 5, 16, 1), {"region": "global", "count": 3}),
+        ]
+
+        rollups = rollup_rows(rows, ["count"])
+
+        self.assertEqual(
+            [rollup["key"] for rollup in rollups],
+            [{"region": 1}, {"region": "global"}],
+        )
+
+    def test_rollup_rows_with_null_metric_in_period(self):
+        rows = [
+            (datetime(2024, 5, 16, 0), {"project_id": "project-a", "count": None}),
+            (datetime(2024, 5, 16, 1), {"project_id": "project-a", "count": None}),
+        ]
+
+        rollups = rollup_rows(rows, ["count"])
+
+        # The key stays the same as in periods where count has values.
+        self.assertEqual(rollups[0]["key"], {"project_id": "project-a"})
+        self.assertEqual(rollups[0]["values"], {})
+
+    def test_get_metric_columns(self):
+        aggregate = [
+            {
+                "query": {
+                    "resource_type": "inventory.Server",
+                    "query": {
+                        "aggregate": [
+                            {
+                                "group": {
+                                    "keys": [
+                                        {"key": "project_id", "name": "project_id"}
+                                    ],
+                                    "fields": [
+                                        {"operator": "count", "name": "server_count"}
+                                    ],
+                                }
+                            }
+                        ]
+                    },
+                }
+            },
+            {
+                "join": {
+                    "keys": ["project_id"],
+                    "resource_type": "identity.Project",
+                    "query": {"aggregate": [{"count": {"name": "project_count"}}]},
+                }
+            },
+            {"formula": {"eval": "ratio = server_count / project_count"}},
+            {"sort": [{"key": "server_count", "desc": True}]},
+        ]
+
+        self.assertEqual(
+            get_metric_columns(aggregate),
+            ["server_count", "project_count", "ratio"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import threading
+import time
+import unittest
+
+from spaceone.statistics.lib.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        single_flight = SingleFlight()
+        calls = []
+        results = []
+
+        def _execute():
+            calls.append(1)
+            time.sleep(0.2)
+            return [{"project_id": "project-123", "count": 10}]
+
+        def _run():
+            results.append(single_flight.do("key", _execute))
+
+        threads = [threading.Thread(target=_run) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_error_is_shared_and_key_is_released(self):
+        single_flight = SingleFlight()
+
+        def _fail():
+            raise ValueError("upstream failed")
+
+        with self.assertRaises(ValueError):
+            single_flight.do("key", _fail)
+
+        self.assertEqual(single_flight.do("key", lambda: "retried"), "retried")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,270 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+import mongomock.aggregate
+from mongoengine import connect, disconnect
+
+from spaceone.core import config
+from spaceone.statistics.manager.history_manager import HistoryManager
+from spaceone.statistics.model.history_bucket_model import HistoryBucket, HistoryView
+from spaceone.statistics.model.history_model import History
+
+_handle_array_operator = mongomock.aggregate._Parser._handle_array_operator
+
+
+def _union_with(collection: list, database, options: dict) -> list:
+    union_collection = database[options["coll"]]
+    return collection + list(union_collection.aggregate(options.get("pipeline", [])))
+
+
+def _handle_zip(parser, operator: str, value):
+    if operator == "$zip":
+        inputs = [parser.parse(array) for array in value["inputs"]]
+        return [list(item) for item in zip(*inputs)]
+
+    return _handle_array_operator(parser, operator, value)
+
+
+def _with_union(test_func):
+    # mongomock has neither $unionWith nor $zip, they are added as MongoDB
+    # runs them, so that the union pipeline is tested as it is built.
+    test_func = patch.dict(
+        mongomock.aggregate._PIPELINE_HANDLERS, {"$unionWith": _union_with}
+    )(test_func)
+    return patch.object(
+        mongomock.aggregate._Parser, "_handle_array_operator", _handle_zip
+    )(test_func)
+
+
+class TestHistoryManager(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package="spaceone.statistics")
+        connect(
+            "test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient
+        )
+        # Done by MongoModel.init when the server starts
+        HistoryView._load_default_meta()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        disconnect()
+
+    def setUp(self):
+        History.objects.delete()
+        HistoryBucket.objects.delete()
+        HistoryManager._has_buckets = False
+        HistoryManager._buckets_checked_at = None
+        self.history_mgr = HistoryManager()
+        self.created_at = datetime(2024, 5, 16, 13, 0)
+
+        for index in range(5):
+            History.create(
+                {
+                    "topic": "server_count",
+                    "values": {"project_id": f"project-{index % 2}", "count": index},
+                    "domain_id": "domain-a",
+                    "created_at": self.created_at - timedelta(hours=index // 2),
+                }
+            )
+
+    def _create_bucket(self, rows: list) -> HistoryBucket:
+        return HistoryBucket.create(
+            {
+                "topic": "server_count",
+                "columns": ["project_id", "count"],
+                "rows": rows,
+                "row_count": len(rows),
+                "domain_id": "domain-a",
+                "created_at": self.created_at + timedelta(hours=1),
+            }
+        )
+
+    def test_scan_history_with_cursor(self):
+        query = {
+            "filter": [
+                {"k": "domain_id", "v": "domain-a", "o": "eq"},
+                {"k": "project_id", "v": ["project-0"], "o": "in"},
+            ]
+        }
+
+        history_vos, next_cursor, total_count = self.history_mgr.scan_history(
+            query, limit=2, include_total_count=True
+        )
+        next_history_vos, last_cursor, _ = self.history_mgr.scan_history(
+            query, next_cursor, limit=2
+        )
+
+        self.assertEqual(total_count, 3)
+        self.assertIsNotNone(next_cursor)
+        self.assertIsNone(last_cursor)
+        self.assertEqual(
+            [history_vo.values["count"] for history_vo in history_vos]
+            + [history_vo.values["count"] for history_vo in next_history_vos],
+            [0, 2, 4],
+        )
+
+    def test_scan_history_with_datetime_filter(self):
+        query = {
+            "filter": [
+                {
+                    "k": "created_at",
+                    "v": self.created_at.isoformat(),
+                    "o": "datetime_gte",
+                }
+            ]
+        }
+
+        history_vos, next_cursor, _ = self.history_mgr.scan_history(query)
+
+        self.assertIsNone(next_cursor)
+        self.assertEqual(len(history_vos), 2)
+
+    def test_read_buckets_after_storage_is_turned_off(self):
+        self.assertIs(self.history_mgr._get_read_model(), History)
+
+        self._create_bucket([["project-a", 0]])
+
+        # The empty result is kept for HISTORY_BUCKET_CHECK_INTERVAL,
+        # 60 seconds by default.
+        self.assertIs(self.history_mgr._get_read_model(), History)
+
+        HistoryManager._buckets_checked_at -= 60
+        self.assertIs(self.history_mgr._get_read_model(), HistoryView)
+
+    def test_read_buckets_checks_collection_once_per_interval(self):
+        with patch.object(
+            self.history_mgr.history_bucket_model,
+            "_get_collection",
+            wraps=self.history_mgr.history_bucket_model._get_collection,
+        ) as get_collection:
+            for _ in range(3):
+                self.assertIs(self.history_mgr._get_read_model(), History)
+
+        get_collection.assert_called_once()
+
+    @_with_union
+    def test_list_history_with_buckets(self):
+        self._create_bucket([["project-0", 10], ["project-1", 11]])
+        query = {
+            "filter": [
+                {"k": "domain_id", "v": "domain-a", "o": "eq"},
+                {"k": "project_id", "v": ["project-0"], "o": "in"},
+            ]
+        }
+
+        history_vos, total_count = self.history_mgr.list_history(query)
+
+        self.assertEqual(total_count, 4)
+        self.assertEqual(
+            [history_vo.values["count"] for history_vo in history_vos], [10, 0, 2, 4]
+        )
+        self.assertEqual(history_vos[0].row_index, 0)
+        self.assertEqual(history_vos[0].values["project_id"], "project-0")
+
+    @_with_union
+    def test_scan_history_with_buckets(self):
+        self._create_bucket([["project-0", 10], ["project-1", 11], ["project-0", 12]])
+        query = {"filter": [{"k": "project_id", "v": ["project-0"], "o": "in"}]}
+
+        history_vos, next_cursor, total_count = self.history_mgr.scan_history(
+            query, limit=2, include_total_count=True
+        )
+        next_history_vos, last_cursor, _ = self.history_mgr.scan_history(
+            query, next_cursor, limit=3
+        )
+
+        # Rows of a bucket share created_at and _id, the cursor tells them
+        # apart by row_index.
+        self.assertEqual(total_count, 5)
+        self.assertIsNotNone(next_cursor)
+        self.assertIsNone(last_cursor)
+        self.assertEqual(
+            [history_vo.values["count"] for history_vo in history_vos]
+            + [history_vo.values["count"] for history_vo in next_history_vos],
+            [12, 10, 0, 2, 4],
+        )
+
+    @_with_union
+    def test_stat_history_with_buckets(self):
+        self._create_bucket([["project-0", 10], ["project-1", 11]])
+        query = {
+            "filter": [{"k": "domain_id", "v": "domain-a", "o": "eq"}],
+            "aggregate": [
+                {
+                    "group": {
+                        "keys": [{"key": "values.project_id", "name": "project_id"}],
+                        "fields": [
+                            {"key": "values.count", "name": "count", "operator": "sum"}
+                        ],
+                    }
+                },
+                {"sort": [{"key": "project_id"}]},
+            ],
+        }
+
+        response = self.history_mgr.stat_history(query)
+
+        self.assertEqual(
+            response["results"],
+            [
+                {"project_id": "project-0", "count": 16},
+                {"project_id": "project-1", "count": 15},
+            ],
+        )
+
+    def test_iter_history_batches(self):
+        query = {"filter": [{"k": "project_id", "v": ["project-0"], "o": "in"}]}
+
+        batches = list(self.history_mgr.iter_history_batches(query, batch_size=2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(
+            [row["values"]["count"] for batch in batches for row in batch], [0, 2, 4]
+        )
+        self.assertEqual(set(batches[0][0]), {"_id", "topic", "values", "created_at"})
+
+    @_with_union
+    def test_iter_history_batches_with_buckets(self):
+        self._create_bucket([["project-0", 10], ["project-1", 11]])
+        query = {"filter": [{"k": "project_id", "v": ["project-0"], "o": "in"}]}
+
+        batches = list(self.history_mgr.iter_history_batches(query, batch_size=3))
+
+        self.assertEqual(
+            [[row["values"]["count"] for row in batch] for batch in batches],
+            [[10, 0, 2], [4]],
+        )
+
+    def test_union_pipeline_matches_buckets_before_unwind(self):
+        match = {
+            "$and": [
+                {"domain_id": "domain-a"},
+                {"values.project_id": {"$in": ["project-a"]}},
+                {"created_at": {"$lte": self.created_at}},
+            ]
+        }
+
+        pipeline = HistoryView.get_union_pipeline("history_bucket", match)
+        bucket_pipeline = pipeline[1]["$unionWith"]["pipeline"]
+
+        self.assertEqual(pipeline[0], {"$match": match})
+        self.assertEqual(
+            bucket_pipeline[0],
+            {
+                "$match": {
+                    "$and": [
+                        {"domain_id": "domain-a"},
+                        {"created_at": {"$lte": self.created_at}},
+                    ]
+                }
+            },
+        )
+        self.assertIn("$unwind", bucket_pipeline[1])
+        self.assertEqual(bucket_pipeline[-1], {"$match": match})
+
+
+if __name__ == "__main__":
+    unittest.main()
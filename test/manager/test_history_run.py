@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+
+import mongomock
+from mongoengine import connect, disconnect
+
+from spaceone.core import config
+from spaceone.statistics.manager.history_manager import HistoryManager
+from spaceone.statistics.model.history_model import History
+from spaceone.statistics.model.history_run_model import HistoryRun
+from spaceone.statistics.model.schedule_model import Schedule
+from spaceone.statistics.service.history_service import HistoryService
+
+
+class TestHistoryRun(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package="spaceone.statistics")
+        connect(
+            "test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        disconnect()
+
+    def setUp(self):
+        Schedule.objects.delete()
+        History.objects.delete()
+        HistoryRun.objects.delete()
+        self.history_svc = HistoryService()
+        self.schedule_vo = Schedule.create(
+            {
+                "topic": "project_count",
+                "options": {"aggregate": []},
+                "schedule": {"hours": [0]},
+                "domain_id": "domain-a",
+            }
+        )
+        self.results = [
+            {"project_id": "project-a", "count": 1},
+            {"project_id": "project-b", "count": 2},
+        ]
+
+    def test_create_history(self):
+        with patch.object(
+            self.history_svc.resource_mgr,
+            "stat",
+            return_value={"results": self.results},
+        ):
+            self.history_svc._create_history(self.schedule_vo, {}, "domain-a")
+
+        self.schedule_vo.reload()
+        history_run_vo = HistoryRun.objects.get()
+
+        self.assertIsNone(self.schedule_vo.running_since)
+        self.assertEqual(self.schedule_vo.last_status, "SUCCESS")
+        self.assertEqual(self.schedule_vo.last_row_count, 2)
+        self.assertEqual(history_run_vo.status, "SUCCESS")
+        self.assertEqual(
+            History.objects.filter(run_id=history_run_vo.run_id).count(), 2
+        )
+
+    def test_create_history_skips_running_schedule(self):
+        schedule_mgr = self.history_svc.locator.get_manager("ScheduleManager")
+        self.assertTrue(schedule_mgr.start_run(self.schedule_vo))
+
+        with patch.object(self.history_svc.resource_mgr, "stat") as stat:
+            self.history_svc._create_history(self.schedule_vo, {}, "domain-a")
+
+        stat.assert_not_called()
+        self.assertEqual(HistoryRun.objects.count(), 0)
+
+    def test_create_history_with_failure(self):
+        insert_history = HistoryManager._insert_history
+
+        def _insert_and_fail(history_mgr, *args):
+            insert_history(history_mgr, *args)
+            raise RuntimeError("insert failed")
+
+        with patch.object(
+            self.history_svc.resource_mgr,
+            "stat",
+            return_value={"results": self.results},
+        ), patch.object(HistoryManager, "_insert_history", _insert_and_fail):
+            with self.assertRaises(RuntimeError):
+                self.history_svc._create_history(self.schedule_vo, {}, "domain-a")
+
+        self.schedule_vo.reload()
+        history_run_vo = HistoryRun.objects.get()
+
+        self.assertIsNone(self.schedule_vo.running_since)
+        self.assertEqual(self.schedule_vo.last_status, "FAILURE")
+        self.assertEqual(history_run_vo.status, "FAILURE")
+        self.assertEqual(History.objects.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
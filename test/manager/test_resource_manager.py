@@ -0,0 +1,171 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from spaceone.core import cache, config
+from spaceone.core.auth.jwt.jwt_util import JWTUtil
+from spaceone.core.transaction import get_transaction
+from spaceone.statistics.conf import global_conf
+from spaceone.statistics.manager.resource_manager import ResourceManager
+
+
+class TestResourceManagerSerialization(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "server_count": pd.array([10, None], dtype="Int64"),
+                "is_managed": pd.array([True, None], dtype="boolean"),
+                "project_name": pd.array(["ncsoft", None], dtype="string"),
+                "created_at": pd.to_datetime(["2024-05-16", None]),
+                "cost": [1.5, np.nan],
+            }
+        )
+
+    def test_to_records_with_nullable_dtypes(self):
+        records = ResourceManager._to_records(self.df)
+
+        self.assertEqual(records[0]["server_count"], 10)
+        self.assertEqual(records[0]["is_managed"], True)
+        self.assertEqual(records[0]["project_name"], "ncsoft")
+        self.assertEqual(
+            records[1],
+            {
+                "server_count": None,
+                "is_managed": None,
+                "project_name": None,
+                "created_at": None,
+                "cost": None,
+            },
+        )
+
+    def test_to_columns_with_nullable_dtypes(self):
+        response = ResourceManager._to_columns(self.df)
+
+        for values in response["values"]:
+            self.assertIsNone(values[1])
+
+
+class TestResourceManagerProfile(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package="spaceone.statistics")
+
+    def test_profile_records_rows_after_page(self):
+        df = pd.DataFrame(
+            {"project_id": ["project-a", "project-b", "project-c"], "count": [3, 1, 4]}
+        )
+        aggregate = [
+            {"query": {"resource_type": "identity.Project", "query": {}}},
+            {"sort": [{"key": "count", "desc": True}]},
+        ]
+
+        with patch.object(
+            ResourceManager, "_execute_aggregate_operations", return_value=df
+        ):
+            response = ResourceManager().stat(aggregate, {"limit": 2}, profile=True)
+
+        stages = {stage["operator"]: stage for stage in response["profile"]["stages"]}
+        self.assertEqual(stages["sort+page"]["input_rows"], 3)
+        self.assertEqual(stages["sort+page"]["output_rows"], 2)
+        self.assertEqual(stages["serialize"]["output_rows"], 2)
+
+
+class TestResourceManagerFetch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package="spaceone.statistics")
+        config.set_global_force(STAT_QUERY_MAX_WORKERS=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        config.init_conf(package="spaceone.statistics")
+
+    def setUp(self):
+        get_transaction().set_meta("token", "user-token")
+        self.thread_names = []
+        self.connector = MagicMock()
+
+        def _dispatch(*args, **kwargs):
+            self.thread_names.append(threading.current_thread().name)
+            return {"results": [{"project_id": "project-a"}]}
+
+        self.connector.dispatch.side_effect = _dispatch
+
+    def _make_upstream_requests(self) -> dict:
+        return {
+            f"request-{index}": (
+                self.connector,
+                "Server",
+                {"resource_type": "inventory.Server", "query": {"index": index}},
+            )
+            for index in range(4)
+        }
+
+    @patch.object(JWTUtil, "get_value_from_token", return_value="USER")
+    def test_parallel_fetch_passes_caller_token(self, *args):
+        results = ResourceManager()._fetch_upstream_requests(
+            self._make_upstream_requests()
+        )
+
+        self.assertEqual(len(results), 4)
+        for call in self.connector.dispatch.call_args_list:
+            self.assertEqual(call.kwargs["token"], "user-token")
+
+    @patch.object(JWTUtil, "get_value_from_token", return_value="USER")
+    def test_parallel_fetch_reuses_executor(self, *args):
+        for _ in range(2):
+            ResourceManager()._fetch_upstream_requests(self._make_upstream_requests())
+
+        self.assertEqual(len(self.thread_names), 8)
+        self.assertTrue(
+            all(name.startswith("stat-upstream") for name in self.thread_names)
+        )
+        self.assertLessEqual(len(set(self.thread_names)), 4)
+
+
+class TestResourceManagerCache(unittest.TestCase):
+    def setUp(self):
+        config.init_conf(package="spaceone.statistics")
+        config.set_global_force(
+            **{key: value for key, value in vars(global_conf).items() if key.isupper()}
+        )
+        config.set_global_force(
+            STAT_QUERY_CACHE={**global_conf.STAT_QUERY_CACHE, "enabled": True}
+        )
+        cache._CACHE_CONNECTIONS.clear()
+
+    def tearDown(self):
+        cache._CACHE_CONNECTIONS.clear()
+        config.init_conf(package="spaceone.statistics")
+
+    @patch.object(JWTUtil, "get_value_from_token", return_value="USER")
+    def test_query_with_local_cache(self, *args):
+        connector = MagicMock()
+        connector.dispatch.return_value = {"results": [{"project_id": "project-a"}]}
+        options = {"resource_type": "identity.Project", "query": {"cache": "local"}}
+
+        for _ in range(2):
+            df = ResourceManager()._query(
+                connector, "Project", options, token="user-token"
+            )
+            self.assertEqual(df.to_dict("records"), [{"project_id": "project-a"}])
+
+        self.assertEqual(connector.dispatch.call_count, 1)
+
+    @patch.object(JWTUtil, "get_value_from_token", return_value="USER")
+    def test_query_with_broken_cache(self, *args):
+        config.set_global_force(CACHES={"local": {"max_size": 128}})
+        connector = MagicMock()
+        connector.dispatch.return_value = {"results": [{"project_id": "project-a"}]}
+        options = {"resource_type": "identity.Project", "query": {"cache": "broken"}}
+
+        df = ResourceManager()._query(connector, "Project", options, token="user-token")
+
+        self.assertEqual(df.to_dict("records"), [{"project_id": "project-a"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
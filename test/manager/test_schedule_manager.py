@@ -0,0 +1,195 @@
+import unittest
+from datetime import datetime, timedelta
+
+import mongomock
+from mongoengine import connect, disconnect
+
+from spaceone.core import config
+from spaceone.statistics.manager.schedule_manager import ScheduleManager
+from spaceone.statistics.model.schedule_model import Schedule
+
+
+class TestScheduleManager(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package="spaceone.statistics")
+        connect(
+            "test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        disconnect()
+
+    def setUp(self):
+        Schedule.objects.delete()
+        self.schedule_mgr = ScheduleManager()
+
+    @staticmethod
+    def _create_schedule(**params) -> Schedule:
+        return Schedule.create(
+            {
+                "topic": params.pop("topic", "project_count"),
+                "options": {"aggregate": []},
+                "schedule": {"hours": [0]},
+                "domain_id": params.pop("domain_id", "domain-a"),
+                **params,
+            }
+        )
+
+    def test_start_run(self):
+        schedule_vo = self._create_schedule()
+
+        self.assertTrue(self.schedule_mgr.start_run(schedule_vo))
+        self.assertFalse(self.schedule_mgr.start_run(schedule_vo))
+
+        self.schedule_mgr.finish_run(schedule_vo, "SUCCESS", 1.5, 10)
+        schedule_vo.reload()
+
+        self.assertIsNone(schedule_vo.running_since)
+        self.assertEqual(schedule_vo.last_status, "SUCCESS")
+        self.assertTrue(self.schedule_mgr.start_run(schedule_vo))
+
+    def test_start_run_after_timeout(self):
+        timeout = config.get_global("STAT_SCHEDULE_RUN_TIMEOUT", 3600)
+        schedule_vo = self._create_schedule(
+            running_since=datetime.utcnow() - timedelta(seconds=timeout + 60)
+        )
+
+        self.assertTrue(self.schedule_mgr.start_run(schedule_vo))
+
+    def test_list_due_schedules(self):
+        now = datetime.utcnow()
+        due_schedule_vos = [
+            self._create_schedule(next_run_at=now - timedelta(minutes=5)),
+            self._create_schedule(domain_id="domain-b", next_run_at=now),
+        ]
+        self._create_schedule(topic="server_count", state="DISABLED", next_run_at=now)
+        self._create_schedule(topic="user_count", next_run_at=now + timedelta(hours=1))
+
+        due_schedules = self.schedule_mgr.list_due_schedules(now)
+
+        self.assertEqual(
+            sorted((vo.schedule_id, vo.domain_id) for vo in due_schedule_vos),
+            sorted(
+                (schedule["schedule_id"], schedule["domain_id"])
+                for schedule in due_schedules
+            ),
+        )
+
+        for schedule_vo in due_schedule_vos:
+            schedule_vo.reload()
+            self.assertGreater(schedule_vo.next_run_at, now)
+
+        self.assertEqual(self.schedule_mgr.list_due_schedules(now), [])
+
+    def test_list_due_schedules_with_domain_ids(self):
+        now = datetime.utcnow().replace(microsecond=0)
+        due_schedule_vo = self._create_schedule(next_run_at=now)
+        other_schedule_vo = self._create_schedule(domain_id="domain-b", next_run_at=now)
+
+        due_schedules = self.schedule_mgr.list_due_schedules(now, ["domain-a"])
+
+        self.assertEqual(
+            [schedule["schedule_id"] for schedule in due_schedules],
+            [due_schedule_vo.schedule_id],
+        )
+
+        other_schedule_vo.reload()
+        self.assertEqual(other_schedule_vo.next_run_at, now)
+        self.assertIsNone(other_schedule_vo.last_scheduled_at)
+
+    def test_list_due_schedules_claims_once(self):
+        now = datetime.utcnow()
+        schedule_vo = self._create_schedule(next_run_at=now - timedelta(minutes=1))
+        self._create_schedule(
+            topic="server_count", domain_id="domain-b", next_run_at=now
+        )
+
+        due_schedules = self.schedule_mgr.list_due_schedules(now, ["domain-a"])
+
+        self.assertEqual(
+            due_schedules,
+            [{"schedule_id": schedule_vo.schedule_id, "domain_id": "domain-a"}],
+        )
+        self.assertEqual(self.schedule_mgr.list_due_schedules(now, ["domain-a"]), [])
+        self.assertEqual(len(self.schedule_mgr.list_due_schedules(now)), 1)
+
+    def test_list_due_schedules_by_job_limit(self):
+        now = datetime.utcnow()
+        for topic in ["project_count", "server_count", "user_count"]:
+            self._create_schedule(topic=topic, next_run_at=now)
+        self._create_schedule(
+            topic="project_count", domain_id="domain-b", next_run_at=now
+        )
+
+        due_schedules = self.schedule_mgr.list_due_schedules(
+            now, job_limit=2, job_size=2
+        )
+
+        # Two jobs of domain-a take the limit, domain-b would open a third one.
+        self.assertEqual(
+            [schedule["domain_id"] for schedule in due_schedules],
+            ["domain-a", "domain-a", "domain-a"],
+        )
+
+    def test_list_due_schedules_by_domain_limit(self):
+        now = datetime.utcnow()
+        for topic in ["project_count", "server_count", "user_count"]:
+            self._create_schedule(topic=topic, next_run_at=now)
+        self._create_schedule(
+            topic="project_count", domain_id="domain-b", next_run_at=now
+        )
+
+        due_schedules = self.schedule_mgr.list_due_schedules(now, domain_limit=2)
+        domain_ids = [schedule["domain_id"] for schedule in due_schedules]
+
+        self.assertEqual(domain_ids.count("domain-a"), 2)
+        self.assertEqual(domain_ids.count("domain-b"), 1)
+
+    def test_list_due_schedules_with_running_schedule(self):
+        now = datetime.utcnow()
+        running_schedule_vo = self._create_schedule(
+            next_run_at=now, running_since=now - timedelta(minutes=5)
+        )
+        stale_schedule_vo = self._create_schedule(
+            topic="server_count",
+            next_run_at=now,
+            running_since=now - timedelta(days=1),
+        )
+
+        due_schedules = self.schedule_mgr.list_due_schedules(now)
+
+        self.assertEqual(
+            [schedule["schedule_id"] for schedule in due_schedules],
+            [stale_schedule_vo.schedule_id],
+        )
+
+        running_schedule_vo.reload()
+        self.assertGreater(running_schedule_vo.next_run_at, now)
+        self.assertIsNone(running_schedule_vo.last_scheduled_at)
+
+    def test_init_next_run_at_in_current_hour(self):
+        now = datetime(2024, 5, 16, 13, 1)
+        schedule_vo = self._create_schedule(schedule={"hours": [13]})
+        dispatched_schedule_vo = self._create_schedule(
+            topic="server_count",
+            schedule={"hours": [13]},
+            last_scheduled_at=datetime(2024, 5, 16, 13, 0, 30),
+        )
+
+        due_schedules = self.schedule_mgr.list_due_schedules(now)
+
+        self.assertEqual(
+            [schedule["schedule_id"] for schedule in due_schedules],
+            [schedule_vo.schedule_id],
+        )
+
+        dispatched_schedule_vo.reload()
+        self.assertEqual(
+            dispatched_schedule_vo.next_run_at, datetime(2024, 5, 17, 13, 0)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()